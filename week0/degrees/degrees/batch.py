@@ -0,0 +1,245 @@
+"""
+Batch queries for degrees.
+
+Reads (source, target) pairs, one per line as "source,target" where each
+side is a person ID or an exact name, and writes one JSON object per
+query. Names that are unknown or ambiguous get an error listing the
+closest candidates. Queries are grouped by source so that a single breadth-first
+tree answers every target asked of that source, and recent trees are
+kept in an LRU cache bounded by a memory budget.
+
+Usage: python batch.py [directory] [--input FILE] [--cache-mb MB]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+from array import array
+from collections import OrderedDict, deque
+
+import degrees
+
+# Queries read before each group-by-source pass
+GROUP_SIZE = 10000
+
+# Name candidates listed when a person cannot be resolved
+CANDIDATES = 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries in batch.")
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--input", help="file of source,target lines (default: stdin)")
+    parser.add_argument("--cache-mb", type=float, default=256,
+                        help="memory budget for cached BFS trees")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+    cache = TreeCache(int(args.cache_mb * (1 << 20)))
+
+    lines = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    with lines:
+        pairs = (row for row in csv.reader(lines) if row)
+        for result in answer_queries(pairs, cache):
+            print(json.dumps(result))
+    cache.close()
+    sys.stdout.flush()
+
+
+def answer_queries(pairs, cache, group_size=GROUP_SIZE):
+    """
+    Yields a result dictionary for every (source, target) pair.
+
+    Pairs are read in groups of `group_size` and answered grouped by
+    source, so results may come out of input order; each one carries the
+    "index" of its pair in the input.
+    """
+    pairs = enumerate(pairs)
+    while True:
+        group = list(itertools.islice(pairs, group_size))
+        if not group:
+            return
+
+        by_source = OrderedDict()
+        for index, pair in group:
+            if len(pair) != 2:
+                yield {"index": index, "error": "expected source,target"}
+                continue
+            source, target = (value.strip() for value in pair)
+            by_source.setdefault(source, []).append((index, target))
+
+        for source, queries in by_source.items():
+            yield from answer_source(source, queries, cache)
+
+
+def answer_source(source, queries, cache):
+    """
+    Yields results for every (index, target) query asked of one source.
+    """
+    source_id = resolve(source)
+    tree = None
+    if source_id is not None:
+        tree = cache.get(source_id)
+    for index, target in queries:
+        result = {"index": index, "source": source, "target": target}
+        target_id = resolve(target)
+        if source_id is None or target_id is None:
+            name = source if source_id is None else target
+            if name.lower() in degrees.names:
+                result["error"] = "ambiguous name"
+            else:
+                result["error"] = "person not found"
+            result["candidates"] = degrees.search_people(name, CANDIDATES)
+        elif not degrees.connected(source_id, target_id):
+            result["degrees"] = None
+        else:
+            path = tree.path_to(degrees.graph.person_index(target_id))
+            if path is None:
+                result["degrees"] = None
+            else:
+                result["degrees"] = len(path)
+                result["path"] = [
+                    [degrees.graph.movie_ids[movie], degrees.graph.person_ids[person]]
+                    for movie, person in path
+                ]
+        yield result
+
+
+def resolve(value):
+    """
+    Returns the person ID for a person ID or an unambiguous name,
+    or None.
+    """
+    if value in degrees.people:
+        return value
+    return degrees.person_id_for_name(value, interactive=False)
+
+
+class BFSTree():
+    """
+    Breadth-first search tree grown from one source over degrees.graph.
+
+    The tree is only grown as far as the targets asked of it so far, and
+    resumes from its saved frontier when a later target is further away.
+    People added to the graph later are made room for as they are needed.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.parent_person = array("i", [-1]) * graph.person_count
+        self.parent_movie = array("i", [-1]) * graph.person_count
+        self.parent_person[source] = source
+        self.frontier = deque([source])
+        self.expanded = 0
+
+    def reached(self, person):
+        return person < len(self.parent_person) and self.parent_person[person] != -1
+
+    def resize(self):
+        """Extends the parent arrays to cover people added to the graph."""
+        missing = self.graph.person_count - len(self.parent_person)
+        if missing > 0:
+            self.parent_person.extend(array("i", [-1]) * missing)
+            self.parent_movie.extend(array("i", [-1]) * missing)
+
+    def grow_until(self, target):
+        """
+        Expands the tree layer by layer until `target` is reached or the
+        source's component is exhausted.
+        """
+        self.resize()
+        graph = self.graph
+        parent_person = self.parent_person
+        parent_movie = self.parent_movie
+        while self.frontier and parent_person[target] == -1:
+            for _ in range(len(self.frontier)):
+                person = self.frontier.popleft()
+                self.expanded += 1
+                for movie, other in graph.neighbors(person):
+                    if parent_person[other] == -1:
+                        parent_person[other] = person
+                        parent_movie[other] = movie
+                        self.frontier.append(other)
+
+    def path_to(self, target):
+        """
+        Returns the (movie, person) path from the source to `target`,
+        or None if they are not connected.
+        """
+        self.grow_until(target)
+        if not self.reached(target):
+            return None
+        path = []
+        person = target
+        while person != self.source:
+            path.append((self.parent_movie[person], person))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+    def size(self):
+        """Returns an estimate of the tree's memory use in bytes."""
+        return (self.parent_person.itemsize * len(self.parent_person)
+                + self.parent_movie.itemsize * len(self.parent_movie)
+                + 8 * len(self.frontier))
+
+
+class TreeCache():
+    """
+    LRU cache of BFSTrees keyed by source person ID, evicting the least
+    recently used trees once their total size exceeds `budget` bytes.
+    The tree in use is always kept, even if it alone exceeds the budget.
+
+    The cache listens for changes to degrees.graph and drops every tree
+    that had reached a person the change touched, until it is closed.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.graph = degrees.graph
+        self.graph.listeners.append(self.invalidate)
+
+    def close(self):
+        """Stops listening for changes to the graph and drops every tree."""
+        if self.invalidate in self.graph.listeners:
+            self.graph.listeners.remove(self.invalidate)
+        self.trees.clear()
+
+    def get(self, person_id):
+        """Returns the tree for a source, building it if not cached."""
+        tree = self.trees.get(person_id)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(person_id)
+        else:
+            self.misses += 1
+            graph = degrees.graph
+            tree = BFSTree(graph, graph.person_index(person_id))
+            self.trees[person_id] = tree
+        self.evict()
+        return tree
+
+    def evict(self):
+        total = sum(tree.size() for tree in self.trees.values())
+        while total > self.budget and len(self.trees) > 1:
+            _, tree = self.trees.popitem(last=False)
+            total -= tree.size()
+
+    def invalidate(self, people):
+        """Drops the trees that had reached any of `people`."""
+        for source, tree in list(self.trees.items()):
+            if any(tree.reached(person) for person in people):
+                del self.trees[source]
+
+    def clear(self):
+        self.trees.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Synthetic-scale benchmarks for degrees.
+
+Generates people, movies and stars CSV files shaped like the IMDB
+exports, where cast sizes and the number of movies per person both
+follow power laws, and measures on them:
+- how long the data takes to load and how much memory it uses;
+- single-pair query latency and nodes expanded, for each search mode;
+- batch query throughput.
+
+Each run appends one JSON line to a results file, keyed by the commit
+that `git rev-parse HEAD` reports. `compare` lines up the runs of each
+dataset so commits can be compared. Answers are recorded as a digest of
+the path lengths found, so a change in results between commits shows.
+
+Usage:
+    python bench.py generate DIRECTORY --edges N [--seed S]
+    python bench.py run DIRECTORY [--queries N] [--modes MODE,...] [--results FILE]
+    python bench.py compare [--results FILE]
+"""
+
+import argparse
+import csv
+import gc
+import hashlib
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from array import array
+from bisect import bisect_right
+
+import degrees
+from batch import TreeCache, answer_queries
+from server import percentile
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Results file written and read when none is given
+RESULTS = "bench-results.jsonl"
+
+# Pareto shape of cast sizes (smaller means more huge casts), and their cap
+CAST_SHAPE = 1.3
+MAX_CAST = 250
+
+# Zipf exponent of how often each person is cast
+PERSON_SKEW = 0.5
+
+# Star links per person, on average, when sizing the people table
+MOVIES_PER_PERSON = 3
+
+# Name parts for generated people, so some names are shared
+FIRST_NAMES = [
+    "Ada", "Alan", "Ana", "Bruno", "Carla", "Chen", "Diego", "Emma", "Felipe",
+    "Grace", "Hugo", "Ines", "Jack", "Julia", "Kenji", "Lara", "Lucas", "Maria",
+    "Mateus", "Nina", "Omar", "Paula", "Rafael", "Sofia", "Tom", "Vera",
+]
+SYLLABLES = [
+    "al", "ber", "ca", "dor", "el", "fi", "gan", "ho", "is", "ja", "ko", "lin",
+    "mar", "no", "os", "per", "ri", "san", "ta", "ven",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees at scale.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write a synthetic dataset")
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--edges", type=int, default=100000,
+                                 help="number of star links (rows of stars.csv)")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run", help="benchmark a dataset")
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--queries", type=int, default=100,
+                            help="random pairs asked of each search mode")
+    run_parser.add_argument("--modes", default=",".join(degrees.SEARCH_MODES),
+                            help="comma-separated search modes to time")
+    run_parser.add_argument("--batch", type=int, default=10000,
+                            help="pairs answered by the batch benchmark")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--results", default=RESULTS)
+
+    compare_parser = commands.add_parser("compare", help="compare recorded runs")
+    compare_parser.add_argument("--results", default=RESULTS)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        start = time.perf_counter()
+        counts = generate(args.directory, args.edges, args.seed)
+        print(f"Wrote {counts['people']} people, {counts['movies']} movies and "
+              f"{counts['stars']} stars in {time.perf_counter() - start:.1f}s.")
+    elif args.command == "run":
+        modes = [mode for mode in args.modes.split(",") if mode]
+        for mode in modes:
+            if mode not in degrees.SEARCH_MODES:
+                sys.exit(f"Unknown mode: {mode}")
+        result = run(args.directory, args.queries, modes, args.batch, args.seed)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(json.dumps(result, indent=2))
+    else:
+        compare(args.results)
+
+
+def generate(directory, edges, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv to `directory` with
+    `edges` star links in total. Returns the number of rows in each.
+
+    Cast sizes are drawn from a Pareto distribution and each cast member
+    from a Zipf-like popularity over people, so a few people star in a
+    great many movies and most in only one or two.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    person_count = max(2, edges // MOVIES_PER_PERSON)
+
+    # Popularity follows rank, and ranks are shuffled across person IDs
+    popularity = array("d", itertools.accumulate(
+        (rank + 1) ** -PERSON_SKEW for rank in range(person_count)
+    ))
+    total = popularity[-1]
+    person_for_rank = array("I", range(1, person_count + 1))
+    rng.shuffle(person_for_rank)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(1, person_count + 1):
+            writer.writerow([person, person_name(rng), rng.randint(1900, 2005)])
+
+    movie_count = 0
+    written = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w",
+                 encoding="utf-8", newline="") as stars_file:
+        movies = csv.writer(movies_file)
+        stars = csv.writer(stars_file)
+        movies.writerow(["id", "title", "year"])
+        stars.writerow(["person_id", "movie_id"])
+        while written < edges:
+            movie_count += 1
+            size = min(MAX_CAST, int(rng.paretovariate(CAST_SHAPE)),
+                       edges - written, person_count)
+            cast = set()
+            while len(cast) < size:
+                rank = bisect_right(popularity, rng.random() * total)
+                cast.add(person_for_rank[min(rank, person_count - 1)])
+            movies.writerow([movie_count, f"Movie {movie_count}",
+                             rng.randint(1920, 2024)])
+            stars.writerows([person, movie_count] for person in cast)
+            written += size
+
+    return {"people": person_count, "movies": movie_count, "stars": written}
+
+
+def person_name(rng):
+    """Returns a random name made of a first name and a surname."""
+    surname = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+    return f"{rng.choice(FIRST_NAMES)} {surname.capitalize()}"
+
+
+def run(directory, queries, modes, batch_size, seed=0):
+    """
+    Benchmarks a dataset and returns the results as a dictionary.
+    """
+    rng = random.Random(seed)
+    result = {
+        "commit": commit(),
+        "dirty": dirty(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+    }
+
+    gc.collect()
+    before = memory()
+    start = time.perf_counter()
+    report = degrees.load_data(directory)
+    load_seconds = time.perf_counter() - start
+    after = memory()
+
+    graph = degrees.graph
+    result["dataset"] = {
+        "directory": os.path.basename(os.path.normpath(directory)),
+        "people": graph.person_count,
+        "movies": graph.movie_count,
+        "stars": len(graph.person_movies),
+        "components": degrees.components.count(),
+    }
+    result["load"] = {
+        "source": "snapshot" if report is None else "csv",
+        "seconds": round(load_seconds, 3),
+        "rss_mb": megabytes(after["rss"] - before["rss"])
+        if after["rss"] is not None else None,
+        "peak_rss_mb": megabytes(after["peak"]),
+    }
+
+    # Build the landmarks up front so A* timings do not include them
+    if "astar" in modes:
+        start = time.perf_counter()
+        degrees.landmark_index()
+        result["load"]["landmarks_seconds"] = round(time.perf_counter() - start, 3)
+
+    ids = graph.person_ids
+    pairs = [(ids[rng.randrange(graph.person_count)],
+              ids[rng.randrange(graph.person_count)]) for _ in range(queries)]
+    result["queries"] = {mode: time_queries(pairs, mode) for mode in modes}
+    digests = {stats.pop("answers") for stats in result["queries"].values()}
+    result["digest"] = digests.pop() if len(digests) == 1 else "modes disagree"
+
+    # Batches ask many targets of a few sources, as reports usually do
+    sources = [ids[rng.randrange(graph.person_count)]
+               for _ in range(max(1, int(batch_size ** 0.5)))]
+    batch = [(rng.choice(sources), ids[rng.randrange(graph.person_count)])
+             for _ in range(batch_size)]
+    result["batch"] = time_batch(batch)
+    result["memory"] = {"peak_rss_mb": megabytes(memory()["peak"])}
+    return result
+
+
+def time_queries(pairs, mode):
+    """
+    Asks every pair of one search mode, returning latency percentiles,
+    nodes expanded, the share of pairs that were connected and a digest
+    of the answers.
+    """
+    latencies = []
+    expanded = []
+    lengths = []
+    for source, target in pairs:
+        stats = {}
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, mode, stats)
+        latencies.append((time.perf_counter() - start) * 1000)
+        expanded.append(stats["expanded"])
+        lengths.append(-1 if path is None else len(path))
+
+    latencies.sort()
+    return {
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        "max_ms": round(latencies[-1], 3) if latencies else None,
+        "mean_expanded": round(sum(expanded) / len(expanded), 1) if expanded else None,
+        "max_expanded": max(expanded, default=None),
+        "connected": round(sum(length >= 0 for length in lengths) / len(lengths), 3)
+        if lengths else None,
+        "answers": digest(lengths),
+    }
+
+
+def time_batch(pairs):
+    """
+    Answers pairs through the batch module, returning its throughput
+    and how often its tree cache was hit.
+    """
+    cache = TreeCache(256 << 20)
+    try:
+        start = time.perf_counter()
+        answered = sum(1 for _ in answer_queries(pairs, cache))
+        seconds = time.perf_counter() - start
+    finally:
+        cache.close()
+    return {
+        "queries": answered,
+        "seconds": round(seconds, 3),
+        "queries_per_second": round(answered / seconds, 1) if seconds else None,
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+    }
+
+
+def compare(path):
+    """
+    Prints the recorded runs of each dataset, one line per run, marking
+    runs whose answers differ from the dataset's first run.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        sys.exit(f"No results in {path}")
+
+    datasets = {}
+    for result in runs:
+        dataset = result["dataset"]
+        key = (dataset["directory"], dataset["people"], dataset["movies"],
+               dataset["stars"])
+        datasets.setdefault(key, []).append(result)
+
+    for (directory, people, movies, stars), results in datasets.items():
+        print(f"\n{directory}: {people} people, {movies} movies, {stars} stars")
+        modes = list(dict.fromkeys(
+            mode for result in results for mode in result["queries"]
+        ))
+        header = f"{'commit':<12} {'load s':>8} {'rss MB':>8} {'batch q/s':>10}"
+        for mode in modes:
+            header += f" {mode + ' p50 ms':>20} {'expanded':>9}"
+        print(header)
+        first = results[0]["digest"]
+        for result in results:
+            name = result["commit"][:10] + ("+" if result["dirty"] else "")
+            load = result["load"]
+            line = (f"{name:<12} {load['seconds']:>8} {str(load['rss_mb']):>8} "
+                    f"{str(result['batch']['queries_per_second']):>10}")
+            for mode in modes:
+                stats = result["queries"].get(mode)
+                if stats is None:
+                    line += f" {'-':>20} {'-':>9}"
+                else:
+                    line += f" {str(stats['p50_ms']):>20} {str(stats['mean_expanded']):>9}"
+            if result["digest"] != first:
+                line += "  answers differ"
+            print(line)
+
+
+def digest(values):
+    """Returns a short hash of a list of ints."""
+    return hashlib.sha1(array("i", values).tobytes()).hexdigest()[:16]
+
+
+def memory():
+    """
+    Returns this process's current and peak resident memory in bytes,
+    each None where the platform cannot tell.
+    """
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        if sys.platform != "darwin":
+            peak *= 1024
+    return {"rss": rss, "peak": peak}
+
+
+def megabytes(size):
+    return None if size is None else round(size / (1 << 20), 1)
+
+
+def commit():
+    """Returns the commit the code being benchmarked is at."""
+    return git("rev-parse", "HEAD") or "unknown"
+
+
+def dirty():
+    """Returns True if the degrees code has uncommitted changes."""
+    return bool(git("status", "--porcelain", "--", "."))
+
+
+def git(*args):
+    try:
+        completed = subprocess.run(
+            ["git", *args], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    except OSError:
+        return None
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+from array import array
+
+
+class Components():
+    """
+    Connected components of the co-star graph.
+
+    labels[p] is the component of person p, numbered densely from 0, and
+    sizes[c] is the number of people in component c. Two people are
+    connected by some path exactly when their labels are equal.
+
+    After incremental updates, components that were joined are recorded
+    in `merged`, which maps a label to the label it was merged into, and
+    the people and labels whose entries changed in `changed_people` and
+    `changed_labels`, so only those need to be saved.
+    """
+
+    def __init__(self, labels, sizes, merged=None):
+        self.labels = labels
+        self.sizes = sizes
+        self.merged = {} if merged is None else merged
+        self.changed_people = set()
+        self.changed_labels = set()
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Labels a graph's components with a union-find over every movie's
+        list of stars.
+        """
+        parent = array("I", range(graph.person_count))
+        size = array("I", [1]) * graph.person_count
+
+        def find(person):
+            # Path halving keeps the trees shallow without recursion
+            while parent[person] != person:
+                parent[person] = parent[parent[person]]
+                person = parent[person]
+            return person
+
+        for movie in range(graph.movie_count):
+            stars = graph.stars_of(movie)
+            if len(stars) < 2:
+                continue
+            root = find(stars[0])
+            for star in stars[1:]:
+                other = find(star)
+                if other == root:
+                    continue
+                if size[other] > size[root]:
+                    root, other = other, root
+                parent[other] = root
+                size[root] += size[other]
+
+        # Number the components in order of their first person
+        labels = array("I", bytes(4 * graph.person_count))
+        sizes = array("I")
+        numbers = {}
+        for person in range(graph.person_count):
+            root = find(person)
+            if root not in numbers:
+                numbers[root] = len(sizes)
+                sizes.append(size[root])
+            labels[person] = numbers[root]
+        return cls(labels, sizes)
+
+    @classmethod
+    def for_graph(cls, graph):
+        """
+        Returns the components saved with a graph's snapshot, or builds
+        them if the graph has none.
+        """
+        indexes = graph.indexes
+        if "component_labels" not in indexes or "component_sizes" not in indexes:
+            return cls.build(graph)
+
+        # Merges and the entries a snapshot's delta changed are saved
+        # flat, as pairs of ints
+        pairs = indexes.get("component_merged", [])
+        components = cls(indexes["component_labels"], indexes["component_sizes"],
+                         dict(zip(pairs[0::2], pairs[1::2])))
+        label_changes = indexes.get("component_label_changes", [])
+        size_changes = indexes.get("component_size_changes", [])
+        if label_changes or size_changes:
+            components.editable()
+            patch(components.labels, label_changes, components.changed_people)
+            patch(components.sizes, size_changes, components.changed_labels)
+        return components
+
+    def indexes(self):
+        """Returns the arrays to save with a graph's snapshot."""
+        merged = array("I")
+        for label, root in self.merged.items():
+            merged.extend((label, root))
+        return {
+            "component_labels": self.labels,
+            "component_sizes": self.sizes,
+            "component_merged": merged
+        }
+
+    def changes(self):
+        """
+        Returns the arrays to save in a snapshot's delta, patching the
+        components saved with the snapshot.
+        """
+        labels = array("I")
+        for person in sorted(self.changed_people):
+            labels.extend((person, self.labels[person]))
+        sizes = array("I")
+        for label in sorted(self.changed_labels):
+            sizes.extend((label, self.sizes[label]))
+        indexes = self.indexes()
+        indexes.pop("component_labels")
+        indexes.pop("component_sizes")
+        indexes["component_label_changes"] = labels
+        indexes["component_size_changes"] = sizes
+        return indexes
+
+    def connected(self, person, other):
+        """Returns True if there is a path between two people."""
+        return self.label(person) == self.label(other)
+
+    def label(self, person):
+        """Returns the component a person belongs to."""
+        label = self.labels[person]
+        while label in self.merged:
+            label = self.merged[label]
+        return label
+
+    def size(self, person):
+        """Returns the number of people in a person's component."""
+        return self.sizes[self.label(person)]
+
+    def count(self):
+        """Returns the number of components."""
+        return len(self.sizes) - len(self.merged)
+
+    def add_person(self):
+        """Gives a newly added person a component of their own."""
+        self.editable()
+        self.changed_people.add(len(self.labels))
+        self.changed_labels.add(len(self.sizes))
+        self.labels.append(len(self.sizes))
+        self.sizes.append(1)
+
+    def join(self, graph, person, movie):
+        """
+        Updates the components after a person was added to a movie's cast,
+        merging the person's component with the rest of the cast's.
+        """
+        self.editable()
+        root = self.label(person)
+        for star in graph.stars_of(movie):
+            other = self.label(star)
+            if other != root:
+                if self.sizes[other] > self.sizes[root]:
+                    root, other = other, root
+                self.merged[other] = root
+                self.sizes[root] += self.sizes[other]
+                self.sizes[other] = 0
+                self.changed_labels.update((root, other))
+
+    def split(self, graph, person, movie):
+        """
+        Updates the components after a person was removed from a movie's
+        cast. The rest of the cast stays connected through the movie, so
+        the component splits in two at most: a search from the person
+        either reaches one of them or labels what it reached as a new
+        component.
+        """
+        self.editable()
+        cast = set(graph.stars_of(movie))
+        if not cast:
+            return
+        reached = {person}
+        layer = [person]
+        while layer:
+            next_layer = []
+            for current in layer:
+                for _, other in graph.neighbors(current):
+                    if other in cast:
+                        return
+                    if other not in reached:
+                        reached.add(other)
+                        next_layer.append(other)
+            layer = next_layer
+
+        old = self.label(person)
+        new = len(self.sizes)
+        self.sizes.append(len(reached))
+        self.sizes[old] -= len(reached)
+        self.changed_labels.update((old, new))
+        for other in reached:
+            self.labels[other] = new
+        self.changed_people.update(reached)
+
+    def editable(self):
+        """Copies snapshot-backed arrays so they can be updated."""
+        if not isinstance(self.labels, array):
+            self.labels = array("I", self.labels)
+        if not isinstance(self.sizes, array):
+            self.sizes = array("I", self.sizes)
+
+
+def patch(values, pairs, changed):
+    """
+    Sets values[index] to value for flat index, value pairs sorted by
+    index, appending past the end, and records the indexes in `changed`.
+    """
+    for i in range(0, len(pairs), 2):
+        index, value = pairs[i], pairs[i + 1]
+        if index == len(values):
+            values.append(value)
+        else:
+            values[index] = value
+        changed.add(index)
@@ -1,7 +1,13 @@
-import csv
 import sys
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+from components import Components
+from graph import Graph
+from landmarks import Landmarks
+from loader import load_graph
+from namesearch import NameSearch
+from snapshot import load_snapshot
+from util import Node, StackFrontier, QueueFrontier, PriorityFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,53 +18,57 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact co-star graph that people and movies are views of
+graph = Graph([], [], [], [], [], [], [0], [], [0], [], [])
+
+# Connected components of the graph, for instant "Not connected." answers
+components = Components([], [])
+
+# Optional landmark distance oracle, built on first use unless saved
+landmarks = None
+
+# Prefix and fuzzy name lookups over the graph
+name_search = NameSearch(graph)
+
 
 def load_data(directory):
     """
-    Load data from CSV files into memory.
-    """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
-    
-   
+    Load data into memory, from the directory's snapshot when it is
+    up to date and from the CSV files otherwise.
+
+    Returns the CSV loader's report (see loader.load_graph), or None if
+    the snapshot was used.
+    """
+    global graph, components, landmarks, name_search, names, people, movies
+
+    report = None
+    graph = load_snapshot(directory)
+    if graph is None:
+        graph, report = load_graph(directory)
+    components = Components.for_graph(graph)
+    landmarks = Landmarks.saved(graph)
+    name_search = NameSearch(graph)
+    names = graph.names()
+    people = graph.people()
+    movies = graph.movies()
+    return report
+
 
 def main():
-    directory= 'small'
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python degrees.py [directory] [mode]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "small"
+    mode = sys.argv[2] if len(sys.argv) > 2 else "bidirectional"
+    if mode not in SEARCH_MODES:
+        sys.exit(f"Unknown mode. Choose from: {', '.join(SEARCH_MODES)}")
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(directory)
     print("Data loaded.")
+    if report is not None:
+        print(f"Parsed {report['rows']} rows in {report['seconds']:.2f}s "
+              f"({report['rows_per_second']:.0f} rows/sec), "
+              f"skipped {report['dangling']} dangling star rows.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -67,7 +77,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, mode)
 
     if path is None:
         print("Not connected.")
@@ -82,59 +92,278 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
-    node= Node(state=source, parent=None, action= None)
-    frontier= QueueFrontier()
+def shortest_path(source, target, mode="bfs", stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None. People in different components
+    are answered from the component index without searching.
+
+    `mode` picks the search engine (see SEARCH_MODES). If `stats` is a
+    dictionary, the number of people expanded is stored in stats["expanded"].
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode: {mode}")
+    if stats is not None:
+        stats["expanded"] = 0
+
+    # Engines search over the graph's dense person and movie ints
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        raise KeyError(source if source_index is None else target)
+    if not components.connected(source_index, target_index):
+        return None
+    path = SEARCH_MODES[mode](source_index, target_index, stats)
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def breadth_first_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs
+    that connect the source to the target, growing a single
+    breadth-first search out of the source.
+    """
+    node = Node(state=source, parent=None, action=None)
+    frontier = QueueFrontier()
     frontier.add(node)
-    explored = set()
+    explored = bytearray(graph.person_count)
 
-    while True: 
+    while True:
         if frontier.empty():
             return None
-        #Verifica se minha fronteira tem o alvo
-        if frontier.contains_state(target):
-            #Encontra o alvo e define o caminho até ele
-            while True:
-                node= frontier.remove()
-                if node.state == target:
-                    path= []
-                    while node.parent is not None:
-                        actor= node.state
-                        movie= node.action
-                        path.append((movie,actor))
-                        node= node.parent
-                    path.reverse()
-                    return path
-        
-        #Se não tem remove um nó e coloca seus filhos
+
+        #Remove um nó; se for o alvo, define o caminho até ele
         node = frontier.remove()
-        explored.add(node.state)
+        if node.state == target:
+            path = []
+            while node.parent is not None:
+                path.append((node.action, node.state))
+                node = node.parent
+            path.reverse()
+            return path
+
+        #Se não for, coloca seus filhos
+        explored[node.state] = 1
+        if stats is not None:
+            stats["expanded"] += 1
 
         #Encontra os pares filme,ator q são vizinhos do ator node
-        neighbors= neighbors_for_person(node.state)
-        for i in neighbors:
-            if i[1] not in explored:
-                child= Node(state=i[1],parent=node,action=i[0])
+        for movie, person in graph.neighbors(node.state):
+            if not explored[person] and not frontier.contains_state(person):
+                child = Node(state=person, parent=node, action=movie)
                 frontier.add(child)
 
 
+def bidirectional_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs
+    that connect the source to the target, growing one frontier from
+    each end and always expanding a whole layer of the smaller one.
+
+    Because every layer is expanded in full, the first co-star found
+    on the other side closes a shortest path.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a person to the (movie, person) step that
+    # leads back towards its own root, or None for the root itself
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
 
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            meeting = expand_layer(forward_layer, forward, backward, stats)
+            if meeting is not None:
+                return join_paths(forward, backward, *meeting)
+        else:
+            meeting = expand_layer(backward_layer, backward, forward, stats)
+            if meeting is not None:
+                movie, person, other = meeting
+                return join_paths(forward, backward, movie, other, person)
+    return None
 
 
-   
-    
+def expand_layer(layer, parents, others, stats):
+    """
+    Replaces `layer` in place with the next breadth-first layer of one
+    side of a bidirectional search.
+
+    Returns (movie, person, other) as soon as a co-star of person
+    is found in `others`, or None once the layer is done.
+    """
+    next_layer = []
+    for person in layer:
+        if stats is not None:
+            stats["expanded"] += 1
+        for movie, other in graph.neighbors(person):
+            if other in parents:
+                continue
+            if other in others:
+                return movie, person, other
+            parents[other] = (movie, person)
+            next_layer.append(other)
+    layer[:] = next_layer
+    return None
+
+
+def movie_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs
+    that connect the source to the target, with a breadth-first search
+    that treats movies as intermediate nodes.
+
+    Each movie's cast is scanned only the first time any of its stars
+    is expanded, and co-stars are visited straight from the cast list,
+    so no (movie, person) pairs are ever collected.
+    """
+    if source == target:
+        return []
+
+    # The movie that reached each person, and the person whose expansion
+    # scanned each movie; -1 marks people and movies not seen yet, and
+    # the source is marked with itself
+    reached_by = array("i", [-1]) * graph.person_count
+    scanned_by = array("i", [-1]) * graph.movie_count
+    reached_by[source] = source
+    layer = [source]
+
+    while layer:
+        next_layer = []
+        for person in layer:
+            if stats is not None:
+                stats["expanded"] += 1
+            for movie in graph.movies_of(person):
+                if scanned_by[movie] != -1:
+                    continue
+                scanned_by[movie] = person
+                for star in graph.stars_of(movie):
+                    if reached_by[star] != -1:
+                        continue
+                    reached_by[star] = movie
+                    if star == target:
+                        path = []
+                        while star != source:
+                            movie = reached_by[star]
+                            path.append((movie, star))
+                            star = scanned_by[movie]
+                        path.reverse()
+                        return path
+                    next_layer.append(star)
+        layer = next_layer
+    return None
+
+
+def astar_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs
+    that connect the source to the target, using A* guided by the
+    landmark lower bounds. The bounds never overestimate, so the path
+    is exact, but far fewer people are expanded than with plain BFS.
+    """
+    estimate = landmark_index().heuristic(target)
+
+    # Among equally promising nodes, prefer the ones furthest along
+    frontier = PriorityFrontier(
+        priority=lambda node: (node.cost + estimate(node.state), -node.cost)
+    )
+    frontier.add(Node(state=source, parent=None, action=None, cost=0))
+    best = {source: 0}
+    explored = bytearray(graph.person_count)
+
+    while not frontier.empty():
+        node = frontier.remove()
+        if explored[node.state]:
+            continue
+        if node.state == target:
+            path = []
+            while node.parent is not None:
+                path.append((node.action, node.state))
+                node = node.parent
+            path.reverse()
+            return path
+
+        explored[node.state] = 1
+        if stats is not None:
+            stats["expanded"] += 1
+
+        cost = node.cost + 1
+        for movie, person in graph.neighbors(node.state):
+            if not explored[person] and cost < best.get(person, cost + 1):
+                best[person] = cost
+                frontier.add(Node(state=person, parent=node, action=movie, cost=cost))
+    return None
+
+
+def landmark_index():
+    """
+    Returns the landmark oracle for the loaded graph, building it
+    the first time it is needed.
+    """
+    global landmarks
+    if landmarks is None:
+        landmarks = Landmarks.build(graph)
+    return landmarks
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people without searching, or None if they are not connected.
+    `upper` is None when no landmark gives one. Raises KeyError for an
+    unknown person.
+    """
+    source_index = person_index(source)
+    target_index = person_index(target)
+    if not components.connected(source_index, target_index):
+        return None
+    return landmark_index().bounds(source_index, target_index)
+
+
+def join_paths(forward, backward, movie, person, other):
+    """
+    Builds the source-to-target path through the edge where both sides
+    of a bidirectional search met: person (reached from the source)
+    starred in movie with other (reached from the target).
+    """
+    path = []
+    node = person
+    while forward[node] is not None:
+        step_movie, previous = forward[node]
+        path.append((step_movie, node))
+        node = previous
+    path.reverse()
 
+    path.append((movie, other))
+    node = other
+    while backward[node] is not None:
+        step_movie, following = backward[node]
+        path.append((step_movie, following))
+        node = following
+    return path
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `interactive` is False, ambiguous names return None instead of
+    prompting; use search_people to list the candidates.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -152,19 +381,61 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def search_people(query, limit=10):
+    """
+    Returns up to `limit` ranked candidates for a full, partial or
+    misspelled name, as dictionaries of: id, name, birth, score.
+    """
+    return name_search.search(query, limit)
+
+
+def connected(source, target):
+    """
+    Returns True if there is any path between two people,
+    without searching for it. Raises KeyError for an unknown person.
+    """
+    return components.connected(person_index(source), person_index(target))
+
+
+def component_size(person_id):
+    """
+    Returns how many people a person is connected to, including themself.
+    Raises KeyError for an unknown person.
+    """
+    return components.size(person_index(person_id))
+
+
+def person_index(person_id):
+    """
+    Returns a person's int in the graph, raising KeyError for an unknown
+    ID as shortest_path does.
+    """
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return person
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.neighbors(graph.person_index(person_id)):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
+# Maps search mode names to the engines behind shortest_path
+SEARCH_MODES = {
+    "bfs": breadth_first_search,
+    "bidirectional": bidirectional_search,
+    "astar": astar_search,
+    "movies": movie_search,
+}
+
+
 if __name__ == "__main__":
     main()
     
@@ -0,0 +1,572 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+
+# Fields of a recorded change, as in an updates.py delta file
+CHANGE_FIELDS = ["action", "table", "id", "name", "year", "person_id", "movie_id"]
+
+
+class Graph():
+    """
+    Compact co-star graph.
+
+    People and movies are interned to dense ints, assigned in sorted ID
+    order so an ID can be found again with a binary search. The
+    person -> movies and movie -> stars lists are stored in CSR form: the
+    movies of person p are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    and likewise for the stars of a movie. name_order lists every person
+    sorted by lowercase name, for name lookups.
+
+    Every attribute only needs to be an indexable sequence, so a graph can
+    be backed by lists and arrays or by a memory-mapped snapshot.
+    `indexes` holds any precomputed arrays (such as component labels)
+    that are saved in the snapshot alongside the graph.
+
+    The CSR arrays are never modified. People, movies and star links
+    added or removed later are kept in an overlay on top of them (see
+    add_person, add_star, remove_star and friends) until compact()
+    folds everything into a fresh graph. Callables in `listeners` are
+    called with the set of person ints each change touches, and every
+    change is recorded in `changes` (see apply) so it can be saved.
+    `snapshot` identifies the snapshot file the graph was mapped from,
+    if any.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.name_order = name_order
+        self.indexes = {}
+        self.listeners = []
+        self.changes = []
+        self.snapshot = None
+
+        # Overlay of changes made since the graph was built
+        self.base_people = len(person_offsets) - 1
+        self.base_movies = len(movie_offsets) - 1
+        self.edited = False
+        self.added_people = {}
+        self.added_movies = {}
+        self.added_names = {}
+        self.removed_people = set()
+        self.removed_movies = set()
+        self.extra_movies = {}
+        self.missing_movies = {}
+        self.extra_stars = {}
+        self.missing_stars = {}
+
+    @classmethod
+    def build(cls, people, movies, stars):
+        """
+        Builds a graph from (id, name, birth) people rows, (id, title, year)
+        movie rows and (person_id, movie_id) star rows.
+
+        Returns the graph and the number of star rows that were skipped
+        because they name an unknown person or movie.
+        """
+        people = {row[0]: row for row in people}
+        movies = {row[0]: row for row in movies}
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Encode every edge as one int so duplicates collapse
+        person_count = len(person_ids)
+        movie_count = len(movie_ids)
+        edges = set()
+        dangling = 0
+        for person_id, movie_id in stars:
+            try:
+                edges.add(person_index[person_id] * movie_count
+                          + movie_index[movie_id])
+            except KeyError:
+                dangling += 1
+        by_movie = sorted(edge % movie_count * person_count + edge // movie_count
+                          for edge in edges)
+
+        graph = cls.from_edges(
+            [people[person_id] for person_id in person_ids],
+            [movies[movie_id] for movie_id in movie_ids],
+            sorted(edges), by_movie
+        )
+        return graph, dangling
+
+    @classmethod
+    def from_edges(cls, people, movies, by_person, by_movie):
+        """
+        Builds a graph from people and movie rows sorted by ID, numbered in
+        that order, and every star link encoded twice, in sorted lists
+        without duplicates: as person * movie count + movie in
+        `by_person`, and as movie * person count + person in `by_movie`.
+        """
+        person_count = len(people)
+        movie_count = len(movies)
+
+        # Sorted codes are the CSR lists already; a row starts at its
+        # first code
+        person_movies = array("I", [edge % movie_count for edge in by_person])
+        person_offsets = array("I", [bisect_left(by_person, person * movie_count)
+                                     for person in range(person_count + 1)])
+        movie_stars = array("I", [edge % person_count for edge in by_movie])
+        movie_offsets = array("I", [bisect_left(by_movie, movie * person_count)
+                                    for movie in range(movie_count + 1)])
+
+        person_names = [row[1] for row in people]
+        lowered = list(map(str.lower, person_names))
+        name_order = array("I", sorted(range(person_count), key=lowered.__getitem__))
+
+        return cls(
+            [row[0] for row in people],
+            person_names,
+            [row[2] for row in people],
+            [row[0] for row in movies],
+            [row[1] for row in movies],
+            [row[2] for row in movies],
+            person_offsets, person_movies, movie_offsets, movie_stars,
+            name_order
+        )
+
+    @property
+    def person_count(self):
+        return len(self.person_ids)
+
+    @property
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    def person_index(self, person_id, include_removed=False):
+        """Returns the int for a person's ID, or None if unknown."""
+        person = find(self.person_ids, person_id, self.base_people)
+        if not self.edited:
+            return person
+        if person is None:
+            person = self.added_people.get(person_id)
+        if person in self.removed_people and not include_removed:
+            return None
+        return person
+
+    def movie_index(self, movie_id, include_removed=False):
+        """Returns the int for a movie's ID, or None if unknown."""
+        movie = find(self.movie_ids, movie_id, self.base_movies)
+        if not self.edited:
+            return movie
+        if movie is None:
+            movie = self.added_movies.get(movie_id)
+        if movie in self.removed_movies and not include_removed:
+            return None
+        return movie
+
+    def movies_of(self, person):
+        """Returns the movies a person starred in."""
+        if person < self.base_people:
+            offsets = self.person_offsets
+            movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        else:
+            movies = ()
+        if self.edited:
+            return overlaid(movies, self.extra_movies.get(person),
+                            self.missing_movies.get(person))
+        return movies
+
+    def stars_of(self, movie):
+        """Returns the people who starred in a movie."""
+        if movie < self.base_movies:
+            offsets = self.movie_offsets
+            stars = self.movie_stars[offsets[movie]:offsets[movie + 1]]
+        else:
+            stars = ()
+        if self.edited:
+            return overlaid(stars, self.extra_stars.get(movie),
+                            self.missing_stars.get(movie))
+        return stars
+
+    def neighbors(self, person):
+        """Yields (movie, person) pairs for everyone who starred with a person."""
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person and returns their int. Re-adding a removed person
+        restores them; an existing person is returned unchanged.
+        """
+        person = self.person_index(person_id, include_removed=True)
+        if person is not None:
+            if person in self.removed_people:
+                self.removed_people.discard(person)
+                self.record("add", "person", person_id, name, birth)
+            return person
+        self.start_editing()
+        person = self.person_count
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.added_people[person_id] = person
+        self.added_names.setdefault(name.lower(), set()).add(person)
+        self.record("add", "person", person_id, name, birth)
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie and returns its int. Re-adding a removed movie
+        restores it; an existing movie is returned unchanged.
+        """
+        movie = self.movie_index(movie_id, include_removed=True)
+        if movie is not None:
+            if movie in self.removed_movies:
+                self.removed_movies.discard(movie)
+                self.record("add", "movie", movie_id, title, year)
+            return movie
+        self.start_editing()
+        movie = self.movie_count
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self.added_movies[movie_id] = movie
+        self.record("add", "movie", movie_id, title, year)
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Records that a person starred in a movie. Returns False if
+        they already did.
+        """
+        if movie in self.movies_of(person):
+            return False
+        self.start_editing()
+        self.link(person, movie, self.extra_movies, self.missing_movies)
+        self.link(movie, person, self.extra_stars, self.missing_stars)
+        self.record("add", "star", person_id=self.person_ids[person],
+                    movie_id=self.movie_ids[movie])
+        self.notify({person, *self.stars_of(movie)})
+        return True
+
+    def remove_star(self, person, movie):
+        """
+        Records that a person no longer starred in a movie. Returns False
+        if they did not.
+        """
+        if movie not in self.movies_of(person):
+            return False
+        self.start_editing()
+        self.link(person, movie, self.missing_movies, self.extra_movies)
+        self.link(movie, person, self.missing_stars, self.extra_stars)
+        self.record("remove", "star", person_id=self.person_ids[person],
+                    movie_id=self.movie_ids[movie])
+        self.notify({person, *self.stars_of(movie)})
+        return True
+
+    def remove_person(self, person):
+        """Removes a person along with every movie they starred in."""
+        for movie in list(self.movies_of(person)):
+            self.remove_star(person, movie)
+        self.start_editing()
+        self.removed_people.add(person)
+        self.record("remove", "person", self.person_ids[person])
+
+    def remove_movie(self, movie):
+        """Removes a movie along with all of its stars."""
+        for person in list(self.stars_of(movie)):
+            self.remove_star(person, movie)
+        self.start_editing()
+        self.removed_movies.add(movie)
+        self.record("remove", "movie", self.movie_ids[movie])
+
+    def start_editing(self):
+        """
+        Switches the graph to overlay mode, making the people and movie
+        columns appendable.
+        """
+        if self.edited:
+            return
+        self.edited = True
+        for name in ("person_ids", "person_names", "person_births",
+                     "movie_ids", "movie_titles", "movie_years"):
+            setattr(self, name, Appendable(getattr(self, name)))
+
+    def link(self, key, value, adding, cancelling):
+        """
+        Records `value` under `key` in the `adding` overlay, unless that
+        just undoes an entry in `cancelling`.
+        """
+        undone = cancelling.get(key)
+        if undone is not None and value in undone:
+            undone.discard(value)
+            if not undone:
+                del cancelling[key]
+        else:
+            adding.setdefault(key, set()).add(value)
+
+    def notify(self, people):
+        for listener in self.listeners:
+            listener(people)
+
+    def record(self, action, table, key="", name="", year="", person_id="",
+               movie_id=""):
+        self.changes.append([action, table, key, name, year, person_id, movie_id])
+
+    def apply(self, change):
+        """
+        Makes a change recorded in `changes` (a list of CHANGE_FIELDS)
+        again. Changes naming unknown people or movies are skipped.
+        """
+        action, table, key, name, year, person_id, movie_id = change
+        if table == "person" and action == "add":
+            self.add_person(key, name, year)
+        elif table == "movie" and action == "add":
+            self.add_movie(key, name, year)
+        elif table == "person" and action == "remove":
+            person = self.person_index(key)
+            if person is not None:
+                self.remove_person(person)
+        elif table == "movie" and action == "remove":
+            movie = self.movie_index(key)
+            if movie is not None:
+                self.remove_movie(movie)
+        elif table == "star":
+            person = self.person_index(person_id)
+            movie = self.movie_index(movie_id)
+            if person is not None and movie is not None:
+                if action == "add":
+                    self.add_star(person, movie)
+                else:
+                    self.remove_star(person, movie)
+
+    def compact(self):
+        """
+        Returns a new graph holding the current people, movies and star
+        links, with no overlay.
+        """
+        people = [
+            (self.person_ids[person], self.person_names[person],
+             self.person_births[person])
+            for person in range(self.person_count)
+            if person not in self.removed_people
+        ]
+        movies = [
+            (self.movie_ids[movie], self.movie_titles[movie],
+             self.movie_years[movie])
+            for movie in range(self.movie_count)
+            if movie not in self.removed_movies
+        ]
+        stars = [
+            (self.person_ids[person], self.movie_ids[movie])
+            for person in range(self.person_count)
+            for movie in self.movies_of(person)
+        ]
+        graph, _ = Graph.build(people, movies, stars)
+        return graph
+
+    def names(self):
+        """Returns a read-only names mapping in the layout degrees.py uses."""
+        return NameIndex(self)
+
+    def people(self):
+        """Returns a read-only people mapping in the layout degrees.py uses."""
+        return PeopleView(self)
+
+    def movies(self):
+        """Returns a read-only movies mapping in the layout degrees.py uses."""
+        return MoviesView(self)
+
+
+class PeopleView(Mapping):
+    """
+    Maps person IDs to dictionaries of: name, birth, movies (a set of
+    movie IDs), built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_of(person)}
+        }
+
+    def __contains__(self, person_id):
+        return self.graph.person_index(person_id) is not None
+
+    def __iter__(self):
+        graph = self.graph
+        for person, person_id in enumerate(graph.person_ids):
+            if person not in graph.removed_people:
+                yield person_id
+
+    def __len__(self):
+        return self.graph.person_count - len(self.graph.removed_people)
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie IDs to dictionaries of: title, year, stars (a set of
+    person IDs), built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[star]
+                      for star in graph.stars_of(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        return self.graph.movie_index(movie_id) is not None
+
+    def __iter__(self):
+        graph = self.graph
+        for movie, movie_id in enumerate(graph.movie_ids):
+            if movie not in graph.removed_movies:
+                yield movie_id
+
+    def __len__(self):
+        return self.graph.movie_count - len(self.graph.removed_movies)
+
+
+class NameIndex(Mapping):
+    """
+    Maps lowercase names to a set of corresponding person IDs, answered
+    with a binary search over the graph's name_order, plus any people
+    added to the graph since it was built.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.keys = NameKeys(graph)
+        self.count = None
+
+    def __getitem__(self, name):
+        graph = self.graph
+        people = set(graph.added_names.get(name, ()))
+        keys = self.keys
+        i = bisect_left(keys, name)
+        while i < len(keys) and keys[i] == name:
+            people.add(graph.name_order[i])
+            i += 1
+        person_ids = {graph.person_ids[person] for person in people
+                      if person not in graph.removed_people}
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        previous = None
+        for name in self.keys:
+            if name != previous and name in self:
+                yield name
+            previous = name
+        keys = self.keys
+        for name in self.graph.added_names:
+            i = bisect_left(keys, name)
+            if (i == len(keys) or keys[i] != name) and name in self:
+                yield name
+
+    def __len__(self):
+        if self.count is None:
+            self.count = sum(1 for _ in self)
+        return self.count
+
+
+class NameKeys(Sequence):
+    """
+    The lowercase names of a graph's people, in name_order.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, i):
+        graph = self.graph
+        return graph.person_names[graph.name_order[i]].lower()
+
+    def __len__(self):
+        return len(self.graph.name_order)
+
+
+class Appendable(Sequence):
+    """
+    A read-only sequence (such as a snapshot column) followed by a list
+    of values appended to it.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.extra = []
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            return self.base[i]
+        return self.extra[i - len(self.base)]
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def append(self, value):
+        self.extra.append(value)
+
+
+def overlaid(values, extra, missing):
+    """
+    Returns `values` without those in `missing`, followed by those in
+    `extra` in sorted order.
+    """
+    if not extra and not missing:
+        return values
+    if missing:
+        values = [value for value in values if value not in missing]
+    else:
+        values = list(values)
+    if extra:
+        values.extend(sorted(extra))
+    return values
+
+
+def find(ids, key, count=None):
+    """
+    Returns the position of `key` in the first `count` items of the
+    sorted sequence `ids` (all of them by default), or None.
+    """
+    if count is None:
+        count = len(ids)
+    i = bisect_left(ids, key, 0, count)
+    if i < count and ids[i] == key:
+        return i
+    return None
@@ -0,0 +1,227 @@
+from array import array
+
+# Stored distance for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Landmarks picked when no count is given
+DEFAULT_LANDMARKS = 16
+
+
+class Landmarks():
+    """
+    Landmark (ALT) distance oracle for the co-star graph.
+
+    A few well-connected people are chosen as landmarks and the
+    breadth-first distance from each of them to every person is stored,
+    one byte per person, in `distances` (landmark i's row starts at
+    i * person_count). By the triangle inequality, for any landmark L
+
+        |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+    which gives distance bounds without searching, and an admissible
+    heuristic for A*.
+
+    The distances follow incremental updates. Adding links can only
+    make them shorter, which add_link() relaxes from the new links.
+    Removing links only makes them longer, so the lower bounds still
+    hold afterwards, and loosen() stops the upper bounds from being
+    used. People added after the landmarks were built keep their
+    distances in `extra`. Cells changed since the landmarks were loaded
+    from a snapshot are recorded in `changed`, so only those need to
+    be saved.
+    """
+
+    def __init__(self, people, distances, person_count, exact=True):
+        self.people = people
+        self.distances = distances
+        self.person_count = person_count
+        self.exact = exact
+        self.extra = {}
+        self.changed = None
+
+    @classmethod
+    def build(cls, graph, k=DEFAULT_LANDMARKS):
+        """
+        Picks the k people with the most co-star links as landmarks and
+        stores the distance from each of them to everyone.
+        """
+        count = graph.person_count
+        links = [0] * count
+        for movie in range(graph.movie_count):
+            stars = graph.stars_of(movie)
+            for star in stars:
+                links[star] += len(stars) - 1
+        people = array("I", sorted(
+            range(count), key=lambda person: links[person], reverse=True
+        )[:k])
+
+        distances = bytearray()
+        for landmark in people:
+            distances += distances_from(graph, landmark)
+        return cls(people, distances, count)
+
+    @classmethod
+    def saved(cls, graph):
+        """
+        Returns the landmarks saved with a graph's snapshot, with the
+        changes saved in its delta applied, or None.
+        """
+        indexes = graph.indexes
+        if "landmark_people" not in indexes:
+            return None
+        people = indexes["landmark_people"]
+        distances = indexes["landmark_distances"]
+        exact = indexes.get("landmark_exact", [1])[0]
+        landmarks = cls(people, distances, len(distances) // max(len(people), 1),
+                        bool(exact))
+        landmarks.changed = set()
+
+        # Changes are saved flat, as row, person, distance triples
+        changes = indexes.get("landmark_changes", [])
+        for i in range(0, len(changes), 3):
+            landmarks.set(changes[i], changes[i + 1], changes[i + 2])
+        return landmarks
+
+    def indexes(self):
+        """Returns the arrays to save with a graph's snapshot."""
+        distances = array("B")
+        count = self.person_count
+        for row in range(len(self.people)):
+            distances.frombytes(self.distances[row * count:(row + 1) * count])
+            distances.extend(self.distance(row, person) for person in
+                             range(count, max(self.extra, default=count - 1) + 1))
+        return {
+            "landmark_people": self.people,
+            "landmark_distances": distances,
+            "landmark_exact": array("B", [int(self.exact)])
+        }
+
+    def changes(self):
+        """
+        Returns the arrays to save in a snapshot's delta, patching the
+        landmarks saved with the snapshot.
+        """
+        changes = array("I")
+        for row, person in sorted(self.changed):
+            changes.extend((row, person, self.column(person)[row]))
+        return {
+            "landmark_changes": changes,
+            "landmark_exact": array("B", [int(self.exact)])
+        }
+
+    def loosen(self):
+        """Keeps only the lower bounds, after links were removed."""
+        self.exact = False
+
+    def column(self, person):
+        """Returns the distances from every landmark to a person."""
+        if person < self.person_count:
+            return self.distances[person::self.person_count]
+        return self.extra.get(person) or bytes([UNREACHABLE]) * len(self.people)
+
+    def distance(self, row, person):
+        """Returns the distance from landmark `row` to a person."""
+        if person < self.person_count:
+            return self.distances[row * self.person_count + person]
+        extra = self.extra.get(person)
+        return UNREACHABLE if extra is None else extra[row]
+
+    def set(self, row, person, distance):
+        """Sets the distance from landmark `row` to a person."""
+        if person < self.person_count:
+            if not isinstance(self.distances, bytearray):
+                self.distances = bytearray(self.distances)
+            self.distances[row * self.person_count + person] = distance
+        else:
+            if person not in self.extra:
+                self.extra[person] = bytearray([UNREACHABLE]) * len(self.people)
+            self.extra[person][row] = distance
+        if self.changed is not None:
+            self.changed.add((row, person))
+
+    def add_link(self, graph, person, movie):
+        """
+        Updates the distances after a person was added to a movie's cast.
+        Only people the new links bring closer to a landmark are visited:
+        a breadth-first search from the cast, for each landmark, stops
+        wherever the old distance is already as short.
+        """
+        cast = graph.stars_of(movie)
+        for row in range(len(self.people)):
+            depth = min(self.distance(row, star) for star in cast) + 1
+            layer = [star for star in cast if self.distance(row, star) > depth]
+            while layer:
+                if depth >= UNREACHABLE:
+                    raise ValueError("graph is too deep for landmark distances")
+                for current in layer:
+                    self.set(row, current, depth)
+                depth += 1
+                next_layer = set()
+                for current in layer:
+                    for _, other in graph.neighbors(current):
+                        if self.distance(row, other) > depth:
+                            next_layer.add(other)
+                layer = next_layer
+
+    def bounds(self, person, other):
+        """
+        Returns (lower, upper) bounds on the number of degrees between
+        two people. `upper` is None when no landmark reaches them, and
+        both are None when a landmark proves they are not connected.
+        """
+        if person == other:
+            return 0, 0
+        lower = 0
+        upper = None
+        for near, far in zip(self.column(person), self.column(other)):
+            if near == UNREACHABLE and far == UNREACHABLE:
+                continue
+            if near == UNREACHABLE or far == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(near - far))
+            if upper is None or near + far < upper:
+                upper = near + far
+        return max(lower, 1), upper if self.exact else None
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from any
+        person to `target`, for A* search.
+        """
+        rows = [(row, far) for row, far in enumerate(self.column(target))
+                if far != UNREACHABLE]
+        column = self.column
+
+        def estimate(person):
+            distances = column(person)
+            best = 0
+            for row, far in rows:
+                near = distances[row]
+                if near != UNREACHABLE and abs(near - far) > best:
+                    best = abs(near - far)
+            return best
+
+        return estimate
+
+
+def distances_from(graph, source):
+    """
+    Returns a bytearray of breadth-first distances from `source` to every
+    person, with UNREACHABLE for people in other components.
+    """
+    distances = bytearray([UNREACHABLE]) * graph.person_count
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie, other in graph.neighbors(person):
+                if distances[other] == UNREACHABLE:
+                    if depth == UNREACHABLE:
+                        raise ValueError("graph is too deep for landmark distances")
+                    distances[other] = depth
+                    next_layer.append(other)
+        layer = next_layer
+    return distances
@@ -0,0 +1,235 @@
+"""
+Parallel CSV ingestion for the degrees dataset.
+
+Each CSV file is split into byte ranges that start and end on line
+boundaries, and the ranges are parsed by a pool of processes. Rows are
+assumed not to contain embedded newlines, which holds for the IMDB
+exports this project uses.
+
+Loading runs in two stages, so that the workers do the heavy lifting and
+the parent only merges sorted runs:
+1. people and movie chunks come back sorted by ID, and are merged into
+   the ID orders that number people and movies;
+2. star chunks are encoded against those orders by workers that know
+   them, and come back as sorted arrays of edge codes, which are merged
+   into the graph's CSR lists (see Graph.from_edges).
+"""
+
+import csv
+import io
+import itertools
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from graph import Graph
+
+# Bytes per chunk handed to a worker; smaller inputs are parsed in-process
+CHUNK_SIZE = 8 << 20
+
+# Columns kept from each file, in the order Graph.build expects
+TABLES = {
+    "people": ("people.csv", ["id", "name", "birth"]),
+    "movies": ("movies.csv", ["id", "title", "year"]),
+    "stars": ("stars.csv", ["person_id", "movie_id"]),
+}
+
+# ID -> int maps the star chunks are encoded against, in each worker
+person_index = None
+movie_index = None
+
+
+def load_graph(directory, workers=None):
+    """
+    Loads a data directory into a Graph, parsing the CSV files in
+    parallel. Returns the graph and a report of: rows, seconds,
+    rows_per_second and dangling (star rows naming an unknown person
+    or movie, which were skipped).
+    """
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = {table: chunk_jobs(directory, table) for table in TABLES}
+
+    # Stage 1: people and movies, sorted by ID within each chunk
+    entities = jobs["people"] + jobs["movies"]
+    chunks = run_chunks(parse_sorted, entities, workers)
+    people = merge_rows(chunks[:len(jobs["people"])])
+    movies = merge_rows(chunks[len(jobs["people"]):])
+
+    # Stage 2: star links, encoded by workers that know the ID orders.
+    # Encoding in this process sets the orders here, so drop them after
+    try:
+        encoded = run_chunks(encode_chunk, jobs["stars"], workers,
+                             set_indexes, (list(people), list(movies)))
+    finally:
+        clear_indexes()
+    by_person = merge_codes(chunk[0] for chunk in encoded)
+    by_movie = merge_codes(chunk[1] for chunk in encoded)
+    graph = Graph.from_edges(list(people.values()), list(movies.values()),
+                             by_person, by_movie)
+
+    seconds = time.perf_counter() - start
+    rows = (sum(len(chunk) for chunk in chunks)
+            + sum(chunk[2] for chunk in encoded))
+    report = {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else float("inf"),
+        "dangling": sum(chunk[3] for chunk in encoded)
+    }
+    return graph, report
+
+
+def chunk_jobs(directory, table):
+    """
+    Returns the (path, start, end, fields) arguments that parse every
+    chunk of a table's CSV file.
+    """
+    filename, columns = TABLES[table]
+    path = os.path.join(directory, filename)
+    fields = header_fields(path, columns)
+    return [(path, start, end, fields)
+            for start, end in chunk_ranges(path, CHUNK_SIZE)]
+
+
+def run_chunks(function, jobs, workers, initializer=None, initargs=()):
+    """
+    Returns function(*job) for every job, in order, computed by a pool
+    of `workers` processes set up by `initializer(*initargs)`, or
+    in-process when there are too few workers or jobs for a pool to pay.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [function(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                             initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(function, *zip(*jobs)))
+
+
+def merge_rows(chunks):
+    """
+    Merges chunks of rows, each sorted by ID, into a dictionary from ID
+    to row in ID order. A repeated ID keeps its last row, as it would in
+    a serial read.
+    """
+    # Sorting runs that are already sorted only merges them
+    rows = sorted(itertools.chain.from_iterable(chunks), key=itemgetter(0))
+    return dict(zip(map(itemgetter(0), rows), rows))
+
+
+def merge_codes(chunks):
+    """
+    Merges sorted arrays of edge codes into one sorted list without
+    duplicates.
+    """
+    codes = sorted(itertools.chain.from_iterable(chunks))
+    return list(dict.fromkeys(codes))
+
+
+def set_indexes(person_ids, movie_ids):
+    """
+    Sets the ID orders encode_chunk numbers people and movies by.
+    """
+    global person_index, movie_index
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+
+def clear_indexes():
+    """
+    Drops the ID orders set by set_indexes.
+    """
+    global person_index, movie_index
+    person_index = None
+    movie_index = None
+
+
+def parse_sorted(path, start, end, fields):
+    """
+    Parses a chunk like parse_chunk, returning its rows sorted by their
+    first field. Rows with the same first field keep their order.
+    """
+    rows = parse_chunk(path, start, end, fields)
+    rows.sort(key=itemgetter(0))
+    return rows
+
+
+def encode_chunk(path, start, end, fields):
+    """
+    Parses a chunk of star rows and encodes its links as in
+    Graph.from_edges. Returns the sorted by_person and by_movie codes of
+    the chunk as arrays, the number of rows, and the number of rows
+    skipped because they name an unknown person or movie.
+    """
+    person_count = len(person_index)
+    movie_count = len(movie_index)
+    rows = parse_chunk(path, start, end, fields)
+    edges = set()
+    dangling = 0
+    for person_id, movie_id in rows:
+        person = person_index.get(person_id)
+        movie = movie_index.get(movie_id)
+        if person is None or movie is None:
+            dangling += 1
+        else:
+            edges.add(person * movie_count + movie)
+    by_person = array("Q", sorted(edges))
+    by_movie = array("Q", sorted(edge % movie_count * person_count + edge // movie_count
+                                 for edge in edges))
+    return by_person, by_movie, len(rows), dangling
+
+
+def header_fields(path, columns):
+    """
+    Returns the positions of `columns` in a CSV file's header row.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f))
+    try:
+        return [header.index(column) for column in columns]
+    except ValueError:
+        raise ValueError(f"{path} must have columns: {', '.join(columns)}")
+
+
+def chunk_ranges(path, chunk_size):
+    """
+    Splits the body of a CSV file (everything after the header) into
+    (start, end) byte ranges of about `chunk_size` bytes, each covering
+    whole lines.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # Move the boundary to just past the next newline
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_chunk(path, start, end, fields):
+    """
+    Parses the CSV lines in bytes [start, end) of a file and returns a
+    tuple of the selected fields for every row.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rows = []
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if row:
+            rows.append(tuple(row[field] for field in fields))
+    return rows
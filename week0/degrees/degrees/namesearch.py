@@ -0,0 +1,193 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left
+
+from graph import NameKeys
+
+# Seconds a fuzzy lookup may spend gathering candidates by default
+DEFAULT_BUDGET = 0.05
+
+
+class NameSearch():
+    """
+    Exact, prefix and fuzzy person-name lookups over a Graph.
+
+    People added to the graph after it was built are matched by scanning
+    them directly, and removed people are left out of the results.
+    Prefix lookups binary-search the graph's name_order. Fuzzy lookups
+    use a trigram index over the distinct names: the trigram codes are
+    kept sorted in `codes`, and the name_order positions holding each
+    trigram are postings[offsets[i]:offsets[i + 1]]. The index is built
+    along with the search, as load_data builds the other indexes, unless
+    it was saved with the graph's snapshot, so that a query's budget is
+    never spent building it.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.keys = NameKeys(graph)
+        self.codes = None
+        self.offsets = None
+        self.postings = None
+        indexes = graph.indexes
+        if "trigram_codes" in indexes:
+            self.codes = indexes["trigram_codes"]
+            self.offsets = indexes["trigram_offsets"]
+            self.postings = indexes["trigram_postings"]
+        else:
+            self.build()
+
+    def build(self):
+        """Builds the trigram index over every distinct name."""
+        postings = {}
+        previous = None
+        for position, name in enumerate(self.keys):
+            if name == previous:
+                continue
+            previous = name
+            for gram in trigrams(name):
+                postings.setdefault(encode(gram), array("I")).append(position)
+
+        self.codes = array("Q", sorted(postings))
+        self.offsets = array("I", [0])
+        self.postings = array("I")
+        for code in self.codes:
+            self.postings.extend(postings[code])
+            self.offsets.append(len(self.postings))
+
+    def indexes(self):
+        """Returns the arrays to save with a graph's snapshot."""
+        return {
+            "trigram_codes": self.codes,
+            "trigram_offsets": self.offsets,
+            "trigram_postings": self.postings
+        }
+
+    def search(self, query, limit=10, budget=DEFAULT_BUDGET):
+        """
+        Returns up to `limit` candidates for a name, best first, as
+        dictionaries of: id, name, birth, score.
+
+        Exact matches score 1, prefix matches just under 1 and fuzzy
+        matches their trigram similarity. People with more movies rank
+        first among equal scores. Fuzzy matching stops gathering
+        candidates once `budget` seconds have passed.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        scores = {}
+        for position in self.prefix_positions(query, limit):
+            name = self.keys[position]
+            scores[position] = 1.0 if name == query else 0.99
+        if len(scores) < limit:
+            for position, score in self.fuzzy_positions(query, limit, budget):
+                scores.setdefault(position, score)
+
+        graph = self.graph
+        people = {graph.name_order[position]: score
+                  for position, score in scores.items()}
+        for name, added in graph.added_names.items():
+            score = added_score(query, name)
+            for person in added:
+                people[person] = max(people.get(person, 0), score)
+
+        candidates = []
+        for person, score in people.items():
+            if score > 0 and person not in graph.removed_people:
+                links = len(graph.movies_of(person))
+                candidates.append((-score, -links, person))
+        candidates.sort()
+
+        results = []
+        for score, _, person in candidates[:limit]:
+            results.append({
+                "id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "score": round(-score, 3)
+            })
+        return results
+
+    def prefix_positions(self, prefix, limit):
+        """
+        Returns up to `limit` name_order positions whose name starts
+        with `prefix`, in name order.
+        """
+        keys = self.keys
+        positions = []
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and len(positions) < limit:
+            if not keys[i].startswith(prefix):
+                break
+            positions.append(i)
+            i += 1
+        return positions
+
+    def fuzzy_positions(self, query, limit, budget):
+        """
+        Returns (position, similarity) pairs for names sharing the most
+        trigrams with `query`, including every person with each name.
+        """
+        grams = trigrams(query)
+        lists = []
+        for gram in grams:
+            i = bisect_left(self.codes, encode(gram))
+            if i < len(self.codes) and self.codes[i] == encode(gram):
+                lists.append(self.postings[self.offsets[i]:self.offsets[i + 1]])
+
+        # Rare trigrams first, so a cut-off still counts the telling ones
+        deadline = time.perf_counter() + budget
+        shared = {}
+        for postings in sorted(lists, key=len):
+            for position in postings:
+                shared[position] = shared.get(position, 0) + 1
+            if time.perf_counter() > deadline:
+                break
+
+        keys = self.keys
+        matches = []
+        for position, count in heapq.nlargest(
+                4 * limit, shared.items(), key=lambda item: item[1]):
+            name = keys[position]
+            similarity = 2 * count / (len(grams) + len(trigrams(name)))
+            matches.append((similarity, position))
+        matches.sort(reverse=True)
+
+        pairs = []
+        for similarity, position in matches[:limit]:
+            name = keys[position]
+            while position < len(keys) and keys[position] == name:
+                pairs.append((position, round(similarity, 3)))
+                position += 1
+        return pairs
+
+
+def added_score(query, name):
+    """
+    Scores a name against a query the same way an indexed name would be.
+    """
+    if name == query:
+        return 1.0
+    if name.startswith(query):
+        return 0.99
+    grams = trigrams(query)
+    shared = len(grams & trigrams(name))
+    return round(2 * shared / (len(grams) + len(trigrams(name))), 3)
+
+
+def normalize(name):
+    """Lowercases a name and collapses its whitespace."""
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """Returns the set of trigrams of a name, padded at both ends."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def encode(gram):
+    """Packs a three-character string into one int (21 bits per code point)."""
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
@@ -0,0 +1,219 @@
+"""
+Long-running degrees query server.
+
+Loads the graph once and answers requests over a Unix socket or a
+localhost TCP port. Each request is one line of JSON and gets one line
+of JSON back; requests on a connection run concurrently, so replies echo
+the request's "id" and may arrive out of order. Searches run on a pool
+of worker processes that share the loaded graph.
+
+Requests:
+    {"op": "path", "source": ID or name, "target": ID or name, "mode": "bidirectional"}
+    {"op": "component", "person": ID or name}
+    {"op": "search", "query": "tom hnks", "limit": 10}
+    {"op": "metrics"}
+
+Usage: python server.py [directory] [--socket PATH | --port PORT] [--workers N]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from batch import resolve
+
+# Latencies kept per operation for the percentile metrics
+WINDOW = 10000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries.")
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--socket", help="Unix socket path to listen on")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="localhost TCP port, if no socket is given")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+    asyncio.run(serve(args.directory, args.socket, args.port, args.workers))
+
+
+async def serve(directory, socket=None, port=8765, workers=1):
+    """
+    Serves requests until cancelled.
+    """
+    server = Server(directory, workers)
+    if socket is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=socket)
+        print(f"Listening on {socket}")
+    else:
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", port)
+        print(f"Listening on 127.0.0.1:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.pool.shutdown(cancel_futures=True)
+
+
+class Server():
+    """
+    Dispatches requests to the worker pool and records their latency.
+    """
+
+    def __init__(self, directory, workers):
+        # Forked workers inherit the graph this process already loaded
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=context,
+            initializer=init_worker, initargs=(directory,)
+        )
+        self.latencies = {}
+        self.counts = {}
+
+    async def handle(self, reader, writer):
+        """Answers every request line on one connection."""
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.reply(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def reply(self, line, writer, lock):
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+        except (ValueError, AttributeError):
+            request, op = {}, None
+
+        if op == "metrics":
+            response = {"metrics": self.metrics()}
+        elif isinstance(op, str) and op in OPERATIONS:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.pool, run_request, request)
+        else:
+            op = "invalid"
+            response = {"error": "unknown or malformed request"}
+
+        latency = (time.perf_counter() - start) * 1000
+        self.record(op, latency)
+        if "id" in request:
+            response["id"] = request["id"]
+        response["latency_ms"] = round(latency, 3)
+        async with lock:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    def record(self, op, latency):
+        self.counts[op] = self.counts.get(op, 0) + 1
+        self.latencies.setdefault(op, deque(maxlen=WINDOW)).append(latency)
+
+    def metrics(self):
+        """
+        Returns the request count and latency percentiles (in ms, over
+        the last WINDOW requests) for each operation.
+        """
+        metrics = {}
+        for op, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            metrics[op] = {
+                "count": self.counts[op],
+                "mean_ms": round(sum(ordered) / len(ordered), 3),
+                "p50_ms": round(percentile(ordered, 50), 3),
+                "p95_ms": round(percentile(ordered, 95), 3),
+                "p99_ms": round(percentile(ordered, 99), 3),
+                "max_ms": round(ordered[-1], 3)
+            }
+        return metrics
+
+
+def init_worker(directory):
+    """
+    Loads the data in a worker process, unless it was inherited.
+    """
+    if degrees.graph.person_count == 0:
+        degrees.load_data(directory)
+
+
+def run_request(request):
+    """
+    Answers one request inside a worker process.
+    """
+    try:
+        return OPERATIONS[request["op"]](request)
+    except KeyError as e:
+        return {"error": f"missing or unknown {e}"}
+    except (TypeError, ValueError) as e:
+        return {"error": str(e)}
+
+
+def find_path(request):
+    source = resolve(str(request["source"]))
+    target = resolve(str(request["target"]))
+    if source is None or target is None:
+        return {"error": "person not found"}
+    stats = {}
+    path = degrees.shortest_path(
+        source, target, request.get("mode", "bidirectional"), stats
+    )
+    response = {"source": source, "target": target, "expanded": stats["expanded"]}
+    if path is None:
+        response["degrees"] = None
+    else:
+        response["degrees"] = len(path)
+        response["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+    return response
+
+
+def find_component(request):
+    person = resolve(str(request["person"]))
+    if person is None:
+        return {"error": "person not found"}
+    return {
+        "person": person,
+        "component": degrees.components.label(degrees.graph.person_index(person)),
+        "size": degrees.component_size(person)
+    }
+
+
+def search_names(request):
+    return {"candidates": degrees.search_people(
+        request["query"], int(request.get("limit", 10))
+    )}
+
+
+def percentile(ordered, percent):
+    """Returns the nearest-rank percentile of a sorted list."""
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+# Operations answered by the worker pool
+OPERATIONS = {
+    "path": find_path,
+    "component": find_component,
+    "search": search_names,
+}
+
+
+if __name__ == "__main__":
+    main()
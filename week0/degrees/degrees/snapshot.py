@@ -0,0 +1,389 @@
+"""
+Binary snapshots of the degrees dataset.
+
+A snapshot holds a compiled Graph, and any indexes built over it, so that
+later runs can memory-map it instead of parsing the CSV files again. Arrays are stored as raw machine
+words and string columns as an offsets array plus one UTF-8 blob, so
+nothing is decoded until it is used.
+
+Changes made to the graph afterwards (see updates.py) are saved in a
+small delta file next to the snapshot rather than by rewriting it: the
+delta holds the graph's change log and the index entries those changes
+touched, and is replayed over the snapshot when it is loaded. Writing a
+new snapshot removes the delta.
+
+Usage: python snapshot.py [directory] [landmarks]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+from components import Components
+from graph import Graph
+from landmarks import Landmarks
+from loader import load_graph
+from namesearch import NameSearch
+
+MAGIC = b"DEGSNAP\0"
+DELTA_MAGIC = b"DEGDELT\0"
+VERSION = 2
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph attributes in constructor order, and how each one is stored
+SECTIONS = [
+    ("person_ids", "strings"),
+    ("person_names", "strings"),
+    ("person_births", "strings"),
+    ("movie_ids", "strings"),
+    ("movie_titles", "strings"),
+    ("movie_years", "strings"),
+    ("person_offsets", "I"),
+    ("person_movies", "I"),
+    ("movie_offsets", "I"),
+    ("movie_stars", "I"),
+    ("name_order", "I"),
+]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python snapshot.py [directory] [landmarks]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "small"
+    landmarks = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    print("Loading data...")
+    graph, _ = load_graph(directory)
+    graph.indexes.update(Components.build(graph).indexes())
+    graph.indexes.update(NameSearch(graph).indexes())
+    if landmarks:
+        graph.indexes.update(Landmarks.build(graph, landmarks).indexes())
+    path = save_snapshot(graph, directory)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes).")
+
+
+def snapshot_path(directory):
+    """
+    Returns where the snapshot for a data directory lives.
+    """
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def delta_path(path):
+    """
+    Returns where the delta saved over a snapshot file lives.
+    """
+    return f"{path}.delta"
+
+
+def snapshot_stamp(path):
+    """
+    Returns the size and modification time of a snapshot file, which
+    tie a delta to the snapshot it was saved over, or None if there is
+    no snapshot.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def fingerprint(directory):
+    """
+    Returns the size, modification time and SHA-256 digest of each
+    source CSV file in a data directory.
+    """
+    sources = {}
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        sources[name] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "sha256": file_digest(path)
+        }
+    return sources
+
+
+def file_digest(path):
+    """
+    Returns the hex SHA-256 digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_fresh(directory, sources):
+    """
+    Returns True if the source CSV files still match the fingerprint
+    recorded in a snapshot.
+
+    Files whose size and modification time are unchanged are trusted
+    without reading them; otherwise the contents are hashed, so a file
+    that was only touched does not invalidate the snapshot.
+    """
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        recorded = sources.get(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if recorded is None or stat.st_size != recorded["size"]:
+            return False
+        if (stat.st_mtime_ns != recorded["mtime"]
+                and file_digest(path) != recorded["sha256"]):
+            return False
+    return True
+
+
+def save_snapshot(graph, directory, path=None):
+    """
+    Writes a graph and its indexes to a versioned snapshot file,
+    recording the fingerprint of the CSV files it was built from.
+    Returns the path.
+    """
+    if path is None:
+        path = snapshot_path(directory)
+
+    blobs = []
+    for name, kind in SECTIONS:
+        column = getattr(graph, name)
+        if kind == "strings":
+            data, offsets = encode_strings(column)
+            blobs.append((f"{name}.offsets", "I", offsets.tobytes()))
+            blobs.append((f"{name}.data", "B", data))
+        else:
+            blobs.append((name, kind, array(kind, column).tobytes()))
+    blobs.extend(index_blobs(graph.indexes))
+
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": fingerprint(directory),
+        "indexes": sorted(graph.indexes)
+    }
+    write_sections(path, MAGIC, header, blobs)
+
+    # The delta was saved over the snapshot this one replaces
+    try:
+        os.remove(delta_path(path))
+    except FileNotFoundError:
+        pass
+    return path
+
+
+def save_delta(graph, directory, indexes):
+    """
+    Writes the changes recorded in a graph mapped from the directory's
+    snapshot, with the index entries they touched, to the snapshot's delta
+    file. Returns the path.
+    """
+    path = delta_path(snapshot_path(directory))
+    header = {
+        "byteorder": sys.byteorder,
+        "snapshot": graph.snapshot,
+        "changes": graph.changes,
+        "indexes": sorted(indexes)
+    }
+    write_sections(path, DELTA_MAGIC, header, index_blobs(indexes))
+    return path
+
+
+def index_blobs(indexes):
+    """
+    Returns the sections that store a dictionary of index arrays.
+    """
+    blobs = []
+    for name, column in indexes.items():
+        typecode = column.format if isinstance(column, memoryview) else column.typecode
+        blobs.append((f"index.{name}", typecode, array(typecode, column).tobytes()))
+    return blobs
+
+
+def write_sections(path, magic, header, blobs):
+    """
+    Writes a header and (name, typecode, bytes) sections to a file,
+    adding the section table to the header.
+    """
+    # Lay out every section on an 8-byte boundary after the header
+    header["sections"] = {}
+    position = 0
+    for name, typecode, blob in blobs:
+        header["sections"][name] = [position, len(blob), typecode]
+        position += padded(len(blob))
+    encoded = json.dumps(header).encode("utf-8")
+    start = padded(len(magic) + 8 + len(encoded))
+
+    # Write to a temporary file first so readers never see half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<II", VERSION, len(encoded)))
+        f.write(encoded)
+        f.write(bytes(start - f.tell()))
+        for name, typecode, blob in blobs:
+            f.write(blob)
+            f.write(bytes(padded(len(blob)) - len(blob)))
+    os.replace(temporary, path)
+
+
+def load_snapshot(directory, path=None):
+    """
+    Memory-maps the snapshot for a data directory and returns it as a
+    Graph, with any delta saved over it replayed, or returns None if
+    there is no usable snapshot: it or its delta is missing or corrupt,
+    was written by another version or machine, or its CSV files changed.
+    """
+    if path is None:
+        path = snapshot_path(directory)
+
+    # A garbled header or section table makes the snapshot unusable, not
+    # an error: the caller falls back to the CSV files
+    try:
+        graph = map_snapshot(directory, path)
+        if graph is not None:
+            graph.snapshot = snapshot_stamp(path)
+            if not replay_delta(graph, path):
+                return None
+        return graph
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def map_file(path, magic):
+    """
+    Memory-maps a file written by write_sections. Returns its header and
+    a function that maps a named section, or None if the file is missing
+    or from another version or machine. Raises ValueError, KeyError or
+    TypeError if the file is corrupt.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    prefix = len(magic) + 8
+    if len(buffer) < prefix or buffer[:len(magic)] != magic:
+        return None
+    version, length = struct.unpack("<II", buffer[len(magic):prefix])
+    if version != VERSION:
+        return None
+    if prefix + length > len(buffer):
+        raise ValueError(f"{path} header is truncated")
+    header = json.loads(buffer[prefix:prefix + length].decode("utf-8"))
+    if header["byteorder"] != sys.byteorder:
+        return None
+
+    start = padded(prefix + length)
+    view = memoryview(buffer)
+
+    def section(name):
+        offset, size, typecode = header["sections"][name]
+        if offset < 0 or size < 0 or start + offset + size > len(buffer):
+            raise ValueError(f"{path} section {name} is truncated")
+        return view[start + offset:start + offset + size].cast(typecode)
+
+    return header, section
+
+
+def map_snapshot(directory, path):
+    """
+    Returns the Graph in a snapshot file, or None if it is missing,
+    stale or from another version or machine. Raises ValueError,
+    KeyError or TypeError if the snapshot is corrupt.
+    """
+    mapped = map_file(path, MAGIC)
+    if mapped is None:
+        return None
+    header, section = mapped
+    if not is_fresh(directory, header["sources"]):
+        return None
+
+    columns = []
+    for name, kind in SECTIONS:
+        if kind == "strings":
+            columns.append(StringTable(
+                section(f"{name}.offsets"), section(f"{name}.data")
+            ))
+        else:
+            columns.append(section(name))
+    graph = Graph(*columns)
+    for name in header["indexes"]:
+        graph.indexes[name] = section(f"index.{name}")
+    return graph
+
+
+def replay_delta(graph, path):
+    """
+    Replays the delta saved over a snapshot file onto the graph mapped
+    from it, and adds the index entries it saved to the graph's indexes
+    for the index classes to apply. A delta saved over an older snapshot
+    is ignored. Returns False if the delta cannot be read.
+    """
+    mapped = map_file(delta_path(path), DELTA_MAGIC)
+    if mapped is None:
+        return not os.path.exists(delta_path(path))
+    header, section = mapped
+    if header["snapshot"] != graph.snapshot:
+        return True
+    for change in header["changes"]:
+        graph.apply(change)
+    for name in header["indexes"]:
+        graph.indexes[name] = section(f"index.{name}")
+    return True
+
+
+class StringTable(Sequence):
+    """
+    Read-only sequence of strings stored as UTF-8 in one buffer, where
+    string i is data[offsets[i]:offsets[i + 1]]. Strings are only decoded
+    when they are read.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+def encode_strings(strings):
+    """
+    Returns the UTF-8 blob and offsets array for a StringTable.
+    """
+    offsets = array("I", [0])
+    chunks = []
+    for string in strings:
+        chunk = string.encode("utf-8")
+        chunks.append(chunk)
+        offsets.append(offsets[-1] + len(chunk))
+    return b"".join(chunks), offsets
+
+
+def padded(size):
+    """
+    Rounds a byte count up to a multiple of 8.
+    """
+    return (size + 7) & ~7
+
+
+if __name__ == "__main__":
+    main()
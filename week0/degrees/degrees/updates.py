@@ -0,0 +1,215 @@
+"""
+Incremental updates to the loaded degrees graph.
+
+Changes are applied to the in-memory graph's overlay and to its
+component index without reloading anything. Caches subscribed to the
+graph's listeners (such as batch.TreeCache) drop the results a change
+touches. The landmark oracle's distances are relaxed from added
+links, and removing links only stops it from giving upper bounds.
+
+A delta file is a CSV with the header
+
+    action,table,id,name,year,person_id,movie_id
+
+where action is "add" or "remove" and table is "person", "movie" or
+"star". People and movies use id, name (the title, for movies) and year
+(the birth year, for people); stars use person_id and movie_id.
+
+Usage: python updates.py [--compact] directory [delta.csv ...]
+
+Applies the deltas and saves them next to the directory's snapshot (see
+snapshot.py), which is left as it is. With --compact, the snapshot is
+instead rebuilt with every saved change folded in. Changes live in the
+snapshot and its delta until the CSV files themselves change, at which
+point the snapshot is rebuilt from them.
+"""
+
+import argparse
+import csv
+import time
+
+import degrees
+from components import Components
+from landmarks import Landmarks
+from namesearch import NameSearch
+from snapshot import save_delta, save_snapshot, snapshot_path, snapshot_stamp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply delta files to a degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("deltas", nargs="*", metavar="delta.csv")
+    parser.add_argument("--compact", action="store_true",
+                        help="rebuild the snapshot with every change folded in")
+    args = parser.parse_args()
+    directory = args.directory
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    for path in args.deltas:
+        start = time.perf_counter()
+        report = apply_delta(path)
+        seconds = time.perf_counter() - start
+        print(f"{path}: applied {report['applied']} changes, "
+              f"skipped {report['skipped']} in {seconds:.2f}s.")
+    path = compact(directory) if args.compact else save(directory)
+    print(f"Wrote {path}.")
+
+
+def add_person(person_id, name, birth):
+    """Adds a person. Returns False if they already exist."""
+    graph = degrees.graph
+    if graph.person_index(person_id) is not None:
+        return False
+    count = graph.person_count
+    graph.add_person(person_id, name, birth)
+    if graph.person_count > count:
+        degrees.components.add_person()
+    return True
+
+
+def add_movie(movie_id, title, year):
+    """Adds a movie. Returns False if it already exists."""
+    if degrees.graph.movie_index(movie_id) is not None:
+        return False
+    degrees.graph.add_movie(movie_id, title, year)
+    return True
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie. Returns False if either is
+    unknown or the link already exists.
+    """
+    graph = degrees.graph
+    person = graph.person_index(person_id)
+    movie = graph.movie_index(movie_id)
+    if person is None or movie is None or not graph.add_star(person, movie):
+        return False
+    degrees.components.join(graph, person, movie)
+    links_added(person, movie)
+    return True
+
+
+def remove_star(person_id, movie_id):
+    """
+    Records that a person no longer starred in a movie. Returns False if
+    the link does not exist.
+    """
+    graph = degrees.graph
+    person = graph.person_index(person_id)
+    movie = graph.movie_index(movie_id)
+    if person is None or movie is None or not graph.remove_star(person, movie):
+        return False
+    degrees.components.split(graph, person, movie)
+    links_removed()
+    return True
+
+
+def remove_person(person_id):
+    """Removes a person and all of their star links."""
+    graph = degrees.graph
+    person = graph.person_index(person_id)
+    if person is None:
+        return False
+    for movie in list(graph.movies_of(person)):
+        remove_star(person_id, graph.movie_ids[movie])
+    graph.remove_person(person)
+    return True
+
+
+def remove_movie(movie_id):
+    """Removes a movie and all of its star links."""
+    graph = degrees.graph
+    movie = graph.movie_index(movie_id)
+    if movie is None:
+        return False
+    for person in list(graph.stars_of(movie)):
+        remove_star(graph.person_ids[person], movie_id)
+    graph.remove_movie(movie)
+    return True
+
+
+def links_added(person, movie):
+    """
+    Shortens the landmark oracle's distances through a person's new
+    links to a movie's cast.
+    """
+    if degrees.landmarks is not None:
+        degrees.landmarks.add_link(degrees.graph, person, movie)
+
+
+def links_removed():
+    """
+    Keeps the landmark oracle but only for lower bounds, which removing
+    links cannot break.
+    """
+    if degrees.landmarks is not None:
+        degrees.landmarks.loosen()
+
+
+def apply_delta(path):
+    """
+    Applies every change in a delta CSV file. Returns a report of how
+    many changes were applied and how many were skipped (unknown rows,
+    or changes that were already in effect).
+    """
+    report = {"applied": 0, "skipped": 0}
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            change = CHANGES.get((row["action"], row["table"]))
+            if change is not None and change(row):
+                report["applied"] += 1
+            else:
+                report["skipped"] += 1
+    return report
+
+
+def save(directory):
+    """
+    Saves the changes made to the graph since the directory's snapshot
+    was written to the snapshot's delta, with the component and
+    landmark entries they changed. Compacts instead if the graph was not
+    loaded from the snapshot. Returns the path written.
+    """
+    graph = degrees.graph
+    if graph.snapshot is None or graph.snapshot != snapshot_stamp(snapshot_path(directory)):
+        return compact(directory)
+    indexes = degrees.components.changes()
+
+    # Landmarks built since loading are not in the snapshot to patch
+    landmarks = degrees.landmarks
+    if landmarks is not None and landmarks.changed is not None:
+        indexes.update(landmarks.changes())
+    return save_delta(graph, directory, indexes)
+
+
+def compact(directory):
+    """
+    Writes the updated graph, compacted, to the directory's snapshot
+    together with fresh indexes, replacing its delta. This rebuilds
+    everything, so it is meant to be run now and then rather than after
+    every delta. Returns the snapshot's path.
+    """
+    graph = degrees.graph.compact()
+    graph.indexes.update(Components.build(graph).indexes())
+    graph.indexes.update(NameSearch(graph).indexes())
+    saved = degrees.graph.indexes.get("landmark_people")
+    if saved is not None:
+        graph.indexes.update(Landmarks.build(graph, len(saved)).indexes())
+    return save_snapshot(graph, directory)
+
+
+# Maps (action, table) pairs in a delta file to the change they make
+CHANGES = {
+    ("add", "person"): lambda row: add_person(row["id"], row["name"], row["year"]),
+    ("add", "movie"): lambda row: add_movie(row["id"], row["name"], row["year"]),
+    ("add", "star"): lambda row: add_star(row["person_id"], row["movie_id"]),
+    ("remove", "person"): lambda row: remove_person(row["id"]),
+    ("remove", "movie"): lambda row: remove_movie(row["id"]),
+    ("remove", "star"): lambda row: remove_star(row["person_id"], row["movie_id"]),
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Self-play benchmark for the Tic Tac Toe engines.
+
+Every engine in tictactoe.ENGINES (plus an m,n,k Game on a 3x3 board)
+plays the same games against itself: each game opens with a few random
+moves and is then played out by the engine. For each engine this
+reports positions answered per second, nodes searched per second and
+per-move latency percentiles. It also times evaluate.evaluate_many on
+every reachable position.
+
+Usage: python bench.py [--games N] [--opening MOVES] [--engines NAME,...] [--cold]
+"""
+
+import argparse
+import random
+import time
+
+import evaluate
+import mnk
+import tictactoe as ttt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tic Tac Toe engines.")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--opening", type=int, default=2,
+                        help="random moves played before the engine takes over")
+    parser.add_argument("--engines", default=",".join(engines()),
+                        help="comma-separated engines to run")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the search tables before every move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    available = engines()
+    names = [name for name in args.engines.split(",") if name]
+    for name in names:
+        if name not in available:
+            parser.error(f"unknown engine: {name}")
+
+    openings = random_openings(args.games, args.opening, args.seed)
+    print(f"{'engine':<10} {'positions/s':>12} {'nodes/s':>12} {'nodes/move':>11} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name in names:
+        ttt.clear_tables()
+        report = self_play(available[name], openings, args.cold)
+        print(f"{name:<10} {report['positions_per_second']:>12.0f} "
+              f"{report['nodes_per_second']:>12.0f} {report['nodes_per_move']:>11.1f} "
+              f"{report['p50_ms']:>8.3f} {report['p95_ms']:>8.3f} "
+              f"{report['p99_ms']:>8.3f} {report['max_ms']:>8.3f}")
+
+    boards = reachable_boards()
+    start = time.perf_counter()
+    evaluate.evaluate_many([[cell for row in board for cell in row] for board in boards])
+    seconds = time.perf_counter() - start
+    print(f"\nevaluate_many: {len(boards)} boards in {seconds:.3f}s "
+          f"({len(boards) / seconds:.0f} positions/s)")
+
+
+def engines():
+    """
+    Returns the engines to benchmark: name -> function(board, stats).
+    """
+    game = mnk.Game(3, 3, 3)
+    return {
+        **ttt.ENGINES,
+        "mnk": lambda board, stats=None: game.best_move(board, stats=stats),
+    }
+
+
+def random_openings(games, moves, seed=0):
+    """Returns `games` boards, each after `moves` random moves."""
+    rng = random.Random(seed)
+    openings = []
+    for _ in range(games):
+        board = ttt.initial_state()
+        for _ in range(moves):
+            if ttt.terminal(board):
+                break
+            board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+        openings.append(board)
+    return openings
+
+
+def self_play(engine, openings, cold=False):
+    """
+    Plays out every opening with `engine` moving for both players.
+    Returns throughput and latency figures for the moves it made.
+    """
+    latencies = []
+    nodes = 0
+    for board in openings:
+        while not ttt.terminal(board):
+            if cold:
+                ttt.clear_tables()
+            stats = {}
+            start = time.perf_counter()
+            move = engine(board, stats)
+            latencies.append(time.perf_counter() - start)
+            nodes += stats.get("nodes", 0)
+            board = ttt.result(board, move)
+
+    seconds = sum(latencies)
+    latencies.sort()
+    return {
+        "positions": len(latencies),
+        "positions_per_second": len(latencies) / seconds if seconds else 0,
+        "nodes_per_second": nodes / seconds if seconds else 0,
+        "nodes_per_move": nodes / len(latencies) if latencies else 0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0,
+    }
+
+
+def reachable_boards():
+    """Returns every board that can come up in a game."""
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = str(board)
+        if key in boards:
+            continue
+        boards[key] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                frontier.append(ttt.result(board, action))
+    return list(boards.values())
+
+
+def percentile(ordered, percent):
+    """Returns the nearest-rank percentile of a sorted list."""
+    if not ordered:
+        return 0
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+if __name__ == "__main__":
+    main()
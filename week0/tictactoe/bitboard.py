@@ -0,0 +1,281 @@
+"""
+Bitboard backend for Tic Tac Toe.
+
+A position is a pair of ints (x, o) with one bit per cell for each
+player: cell (i, j) is bit 3 * i + j. Moves are applied with a bitwise
+OR, and a player has won once one of the WINS masks is fully inside
+their bits. `minimax` takes the same list-of-lists board as
+tictactoe.minimax, converts it once and searches on the masks only.
+"""
+
+import math
+
+ROWS = 3
+COLS = 3
+K = 3
+FULL = (1 << ROWS * COLS) - 1
+
+# Cells in the order moves are tried: center, corners, then edges
+ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Negamax table: canonical key -> entry as in store(), with the value for
+# the player to move and the cell in the canonical numbering
+table = {}
+
+# Whether a stored value is exact or only a lower or upper bound
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def lines(rows, cols, k):
+    """
+    Returns the masks of every run of k cells in a row, column or
+    diagonal of a rows x cols board.
+    """
+    masks = []
+    for i in range(rows):
+        for j in range(cols):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                if 0 <= end_i < rows and 0 <= end_j < cols:
+                    masks.append(sum(1 << (i + step * di) * cols + j + step * dj
+                                     for step in range(k)))
+    return masks
+
+
+def lines_through(rows, cols, masks):
+    """Returns, for each cell, the masks in `masks` that include it."""
+    return [[mask for mask in masks if mask >> cell & 1]
+            for cell in range(rows * cols)]
+
+
+def symmetries(rows, cols):
+    """
+    Returns the rotations and reflections of a rows x cols board, each
+    as the list of cells that land in cells 0, 1, 2... Square boards
+    have 8 symmetries and other boards 4.
+    """
+    last_i, last_j = rows - 1, cols - 1
+    transforms = [
+        lambda i, j: (i, j),
+        lambda i, j: (last_i - i, j),
+        lambda i, j: (i, last_j - j),
+        lambda i, j: (last_i - i, last_j - j),
+    ]
+    if rows == cols:
+        transforms += [
+            lambda i, j: (j, i),
+            lambda i, j: (last_j - j, i),
+            lambda i, j: (j, last_i - i),
+            lambda i, j: (last_j - j, last_i - i),
+        ]
+    permutations = []
+    for transform in transforms:
+        permutation = []
+        for i in range(rows):
+            for j in range(cols):
+                source_i, source_j = transform(i, j)
+                permutation.append(source_i * cols + source_j)
+        permutations.append(permutation)
+    return permutations
+
+
+def permuted_masks(permutation):
+    """
+    Returns a list mapping every mask of the board's cells to the mask
+    with its bits moved by `permutation`.
+    """
+    masks = [0] * (1 << len(permutation))
+    for cell, source in enumerate(permutation):
+        bit = 1 << cell
+        for mask in range(len(masks)):
+            if mask >> source & 1:
+                masks[mask] |= bit
+    return masks
+
+
+WINS = lines(ROWS, COLS, K)
+WINS_THROUGH = lines_through(ROWS, COLS, WINS)
+SYMMETRIES = symmetries(ROWS, COLS)
+PERMUTED = [permuted_masks(permutation) for permutation in SYMMETRIES]
+
+
+def from_board(board):
+    """Returns the (x, o) masks of a list-of-lists board."""
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == 'X':
+                x |= 1 << i * COLS + j
+            elif cell == 'O':
+                o |= 1 << i * COLS + j
+    return x, o
+
+
+def to_board(x, o):
+    """Returns the list-of-lists board of (x, o) masks."""
+    return [['X' if x >> i * COLS + j & 1 else 'O' if o >> i * COLS + j & 1 else None
+             for j in range(COLS)]
+            for i in range(ROWS)]
+
+
+def player(x, o):
+    """Returns the player who has the next turn."""
+    return 'X' if x.bit_count() == o.bit_count() else 'O'
+
+
+def actions(x, o):
+    """Returns the empty cells, as bit numbers."""
+    empty = FULL & ~(x | o)
+    return [cell for cell in range(ROWS * COLS) if empty >> cell & 1]
+
+
+def result(x, o, cell):
+    """Returns the masks after the player to move takes `cell`."""
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise ValueError("Invalid move")
+    if player(x, o) == 'X':
+        return x | bit, o
+    return x, o | bit
+
+
+def wins(mask):
+    """Returns True if a player with these bits has won."""
+    return any(mask & line == line for line in WINS)
+
+
+def winner(x, o):
+    """Returns the winner, if there is one."""
+    if wins(x):
+        return 'X'
+    if wins(o):
+        return 'O'
+    return None
+
+
+def terminal(x, o):
+    """Returns True if the game is over."""
+    return (x | o) == FULL or winner(x, o) is not None
+
+
+def utility(x, o):
+    """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+    return {'X': 1, 'O': -1, None: 0}[winner(x, o)]
+
+
+def canonical(me, them):
+    """
+    Returns the key shared by a position and its rotations and
+    reflections, and the symmetry that maps the position onto it.
+    """
+    best = None
+    for symmetry, permuted in enumerate(PERMUTED):
+        key = permuted[me] << ROWS * COLS | permuted[them]
+        if best is None or key < best:
+            best, best_symmetry = key, symmetry
+    return best, SYMMETRIES[best_symmetry]
+
+
+def minimax(board, stats=None):
+    """
+    Returns the optimal action (i, j) for the current player on a
+    list-of-lists board, or None if the game is over.
+
+    If `stats` is a dictionary, stats["nodes"] counts the positions
+    searched.
+    """
+    if stats is not None:
+        stats.setdefault("nodes", 0)
+    x, o = from_board(board)
+    if terminal(x, o):
+        return None
+    me, them = (x, o) if player(x, o) == 'X' else (o, x)
+
+    best_cell = None
+    best_score = -math.inf
+    empty = FULL & ~(x | o)
+    for cell in ORDER:
+        if not empty >> cell & 1:
+            continue
+        mine = me | 1 << cell
+        if any(mine & line == line for line in WINS_THROUGH[cell]):
+            return divmod(cell, COLS)
+        score = -negamax(them, mine, -math.inf, -best_score, stats)
+        if score > best_score:
+            best_score, best_cell = score, cell
+    return divmod(best_cell, COLS)
+
+
+def negamax(me, them, alpha, beta, stats=None):
+    """
+    Returns the value of a position for the player to move (`me`),
+    whose opponent has not won, under the same window rules as
+    tictactoe.alphabeta1.
+    """
+    key, symmetry = canonical(me, them)
+    value, hint = probe(table, key, alpha, beta)
+    if value is not None:
+        return value
+    if hint is not None:
+        hint = symmetry[hint]
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+
+    empty = FULL & ~(me | them)
+    if not empty:
+        return 0
+
+    window = (alpha, beta)
+    best_score = -math.inf
+    best_cell = None
+    order = ORDER if hint is None else [hint] + [cell for cell in ORDER if cell != hint]
+    for cell in order:
+        if not empty >> cell & 1:
+            continue
+        mine = me | 1 << cell
+        if any(mine & line == line for line in WINS_THROUGH[cell]):
+            score = 1
+        else:
+            score = -negamax(them, mine, -beta, -alpha, stats)
+        if score > best_score:
+            best_score, best_cell = score, cell
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+
+    store(table, key, best_score, window, symmetry.index(best_cell))
+    return best_score
+
+
+def probe(table, key, alpha, beta, depth=0):
+    """
+    Looks a position up in a transposition table filled by store().
+    Returns (value, cell): value is the stored value if it settles the
+    position for an (alpha, beta) window, from a search at least `depth`
+    plies deep, and None otherwise; cell is the best move stored, to try
+    first, or None. Shared by every alpha-beta search over the games.
+    """
+    entry = table.get(key)
+    if entry is None:
+        return None, None
+    value, bound, cell, searched = entry
+    if searched >= depth and (
+            bound == EXACT or (bound == LOWER and value >= beta)
+            or (bound == UPPER and value <= alpha)):
+        return value, cell
+    return None, cell
+
+
+def store(table, key, value, window, cell, depth=0):
+    """
+    Stores the value of a position searched `depth` plies deep with the
+    (alpha, beta) `window`, and its best move. A value at or outside the
+    window is only an upper or lower bound on the position's value.
+    """
+    if value <= window[0]:
+        bound = UPPER
+    elif value >= window[1]:
+        bound = LOWER
+    else:
+        bound = EXACT
+    table[key] = (value, bound, cell, depth)
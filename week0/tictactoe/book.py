@@ -0,0 +1,155 @@
+"""
+Opening book for Tic Tac Toe: the best move and value of every position
+that can come up in a game, solved ahead of time.
+
+Build it with `python book.py`, which writes book.bin next to this file.
+The book holds one entry per non-terminal reachable position, up to
+rotation and reflection. It stores them as two arrays:
+- keys: the sorted canonical keys (bitboard.canonical, with the player
+  to move first);
+- entries: one byte per key, holding the best cell in the canonical
+  numbering in the low 4 bits, and the value for the player to move,
+  plus 1, in the high bits.
+
+The book is loaded the first time it is needed. Positions it lacks (or
+every position, if it was never built) are left to the search.
+
+Usage: python book.py [path]
+"""
+
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left
+
+import bitboard
+
+MAGIC = b"TTTBOOK\x01"
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# (keys, entries) once loaded, False if there is no usable book file
+loaded = None
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK_PATH
+    keys, entries = build()
+    save(keys, entries, path)
+    print(f"Wrote {len(keys)} positions to {path}.")
+
+
+def build():
+    """
+    Solves every non-terminal position reachable from the empty board.
+    Returns the book's (keys, entries) arrays.
+    """
+    solved = {}
+    stack = [(0, 0)]
+    while stack:
+        me, them = stack.pop()
+        key, symmetry = bitboard.canonical(me, them)
+        if key in solved:
+            continue
+        cell, value = solve(me, them)
+        solved[key] = symmetry.index(cell) | (value + 1) << 4
+
+        for cell in bitboard.ORDER:
+            bit = 1 << cell
+            if (me | them) & bit:
+                continue
+            mine = me | bit
+            won = any(mine & line == line for line in bitboard.WINS_THROUGH[cell])
+            if not won and (mine | them) != bitboard.FULL:
+                stack.append((them, mine))
+
+    keys = array("I", sorted(solved))
+    entries = array("B", (solved[key] for key in keys))
+    return keys, entries
+
+
+def solve(me, them):
+    """
+    Returns the best cell for the player to move and its exact value
+    for them: 1 for a win, 0 for a tie, -1 for a loss.
+    """
+    best_cell = None
+    best_value = -math.inf
+    for cell in bitboard.ORDER:
+        bit = 1 << cell
+        if (me | them) & bit:
+            continue
+        mine = me | bit
+        if any(mine & line == line for line in bitboard.WINS_THROUGH[cell]):
+            return cell, 1
+        value = -bitboard.negamax(them, mine, -math.inf, math.inf)
+        if value > best_value:
+            best_cell, best_value = cell, value
+    return best_cell, best_value
+
+
+def save(keys, entries, path=BOOK_PATH):
+    """Writes the book's arrays to a file."""
+    keys = array("I", keys)
+    if sys.byteorder == "big":
+        keys.byteswap()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(keys).to_bytes(4, "little"))
+        f.write(keys.tobytes())
+        f.write(bytes(entries))
+
+
+def load(path=BOOK_PATH):
+    """
+    Reads a book file. Returns its (keys, entries) arrays, or None if the
+    file is missing or not a book of this version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    count = int.from_bytes(data[len(MAGIC):len(MAGIC) + 4], "little")
+    start = len(MAGIC) + 4
+    keys = array("I")
+    keys.frombytes(data[start:start + 4 * count])
+    if sys.byteorder == "big":
+        keys.byteswap()
+    entries = array("B", data[start + 4 * count:])
+    if len(keys) != count or len(entries) != count:
+        return None
+    return keys, entries
+
+
+def lookup(board):
+    """
+    Returns (action, value) for a list-of-lists board from the book,
+    where value is 1 if X wins with best play, -1 if O does and 0 for a
+    tie. Returns None if the book lacks the position or was never built.
+    """
+    global loaded
+    if loaded is None:
+        loaded = load() or False
+    if not loaded or len(board) != bitboard.ROWS or len(board[0]) != bitboard.COLS:
+        return None
+
+    x, o = bitboard.from_board(board)
+    turn = bitboard.player(x, o)
+    me, them = (x, o) if turn == 'X' else (o, x)
+    key, symmetry = bitboard.canonical(me, them)
+    keys, entries = loaded
+    i = bisect_left(keys, key)
+    if i == len(keys) or keys[i] != key:
+        return None
+    cell = symmetry[entries[i] & 0xF]
+    value = (entries[i] >> 4) - 1
+    return divmod(cell, bitboard.COLS), value if turn == 'X' else -value
+
+
+if __name__ == "__main__":
+    main()
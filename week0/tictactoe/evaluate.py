@@ -0,0 +1,147 @@
+"""
+Batch position evaluation for Tic Tac Toe.
+
+`evaluate_many` scores many boards at once, for analytics. Boards are
+given as an N x 9 array: one row of 9 cells per board, read row by row,
+where each cell is "X", "O" or None (or 1, -1 and 0, as in an integer
+array). Boards that are the same up to rotation and reflection are
+solved once, and the distinct positions are split across a pool of
+processes.
+
+Usage: python evaluate.py boards.csv [--workers N]
+
+Reads one board per line as 9 comma-separated cells, and prints
+value,i,j per board (i and j are empty for finished games).
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import book
+
+# Distinct positions handed to each worker at a time; smaller batches
+# are solved in-process
+CHUNK_SIZE = 256
+
+# Cell values read as each player's mark, and as an empty cell
+OWNERS = {'X': 'X', 'x': 'X', 1: 'X', 'O': 'O', 'o': 'O', -1: 'O'}
+EMPTY_CELLS = {None, '', '-', '.', 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate Tic Tac Toe boards.")
+    parser.add_argument("input", help="CSV file with 9 cells per line")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.input, newline="") as f:
+        boards = [[cell.strip() or None for cell in row] for row in csv.reader(f) if row]
+    for value, action in evaluate_many(boards, args.workers):
+        i, j = action if action is not None else ("", "")
+        print(f"{value},{i},{j}")
+
+
+def evaluate_many(boards, workers=None):
+    """
+    Returns a (value, action) pair for every board: value is 1 if X wins
+    with best play, -1 if O does and 0 for a tie, and action is the
+    best move (i, j) for the player to move, or None if the game is over.
+
+    Raises ValueError for a board that cannot come up in a game.
+    """
+    positions = []
+    keys = {}
+    for board in boards:
+        x, o = masks(board)
+        if not reachable(x, o):
+            raise ValueError(f"Invalid board: {list(board)}")
+        key, symmetry = bitboard.canonical(x, o)
+        keys.setdefault(key, None)
+        positions.append((key, symmetry))
+
+    distinct = list(keys)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(distinct) <= CHUNK_SIZE:
+        solved = solve_chunk(distinct)
+    else:
+        chunks = [distinct[i:i + CHUNK_SIZE] for i in range(0, len(distinct), CHUNK_SIZE)]
+        solved = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(solve_chunk, chunks):
+                solved.extend(results)
+    keys = dict(zip(distinct, solved))
+
+    evaluations = []
+    for key, symmetry in positions:
+        value, cell = keys[key]
+        action = None if cell is None else divmod(symmetry[cell], bitboard.COLS)
+        evaluations.append((value, action))
+    return evaluations
+
+
+def masks(board):
+    """
+    Returns the (x, o) bitboards of a board given as 9 cells, or as 3
+    rows of 3 cells.
+    """
+    cells = list(board)
+    if len(cells) == bitboard.ROWS:
+        cells = [cell for row in cells for cell in row]
+    if len(cells) != bitboard.ROWS * bitboard.COLS:
+        raise ValueError(f"Invalid board: {list(board)}")
+    x = o = 0
+    for index, cell in enumerate(cells):
+        owner = OWNERS.get(cell if isinstance(cell, str) or cell is None else int(cell))
+        if owner is None and cell not in EMPTY_CELLS:
+            raise ValueError(f"Invalid cell: {cell!r}")
+        if owner == 'X':
+            x |= 1 << index
+        elif owner == 'O':
+            o |= 1 << index
+    return x, o
+
+
+def reachable(x, o):
+    """
+    Returns True if a position can come up in a game: X has moved as
+    often as O or once more, and play stopped when someone won, so an X
+    win ends on X's move, an O win on O's, and never both.
+    """
+    lead = x.bit_count() - o.bit_count()
+    if not 0 <= lead <= 1:
+        return False
+    if bitboard.wins(x):
+        return lead == 1 and not bitboard.wins(o)
+    if bitboard.wins(o):
+        return lead == 0
+    return True
+
+
+def solve_chunk(keys):
+    """
+    Solves canonical positions. Returns (value, cell) for each, where
+    value is for X and cell is in the canonical numbering (None if the
+    game is over).
+    """
+    results = []
+    size = bitboard.ROWS * bitboard.COLS
+    for key in keys:
+        x, o = key >> size, key & ((1 << size) - 1)
+        if bitboard.terminal(x, o):
+            results.append((bitboard.utility(x, o), None))
+            continue
+        if bitboard.player(x, o) == 'X':
+            cell, value = book.solve(x, o)
+        else:
+            cell, value = book.solve(o, x)
+            value = -value
+        results.append((value, cell))
+    return results
+
+
+if __name__ == "__main__":
+    main()
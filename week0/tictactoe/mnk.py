@@ -0,0 +1,309 @@
+"""
+m,n,k games: Tic Tac Toe on a board of m rows and n columns, where k
+marks in a row (horizontally, vertically or diagonally) win. 3,3,3 is
+Tic Tac Toe; 7,7,5 is a small Gomoku.
+
+Exhaustive search stops being feasible beyond the smallest boards, so
+a Game searches with depth-limited negamax and alpha-beta pruning,
+deepening one ply at a time until its time budget runs out, and scores
+the positions where it stops with a heuristic evaluator. Positions are
+bitboards as in bitboard.py.
+
+A Game has the same functions as the tictactoe module (initial_state,
+player, actions, result, winner, terminal, utility and minimax), taking
+and returning list-of-lists boards, so it can stand in for the module.
+"""
+
+import math
+import time
+
+import bitboard
+import book
+
+# Seconds a move may take when no budget is given
+DEFAULT_BUDGET = 1.0
+
+# Score of a win; wins with more empty cells left score a little higher
+WIN = 1 << 20
+
+# Boards with more cells than this only consider moves at most NEARBY
+# cells away from a mark
+NEARBY_AFTER = 25
+NEARBY = 2
+
+# Entries kept in a game's transposition table before it is cleared
+TABLE_LIMIT = 1 << 20
+
+
+class OutOfTime(Exception):
+    """Raised inside a search once its deadline has passed."""
+
+
+def line_heuristic(game, me, them):
+    """
+    Scores a position for the player to move: every line that holds
+    marks of only one player counts 4 ** marks, for that player.
+    """
+    score = 0
+    for line in game.wins:
+        mine = me & line
+        theirs = them & line
+        if mine and not theirs:
+            score += 4 ** mine.bit_count()
+        elif theirs and not mine:
+            score -= 4 ** theirs.bit_count()
+    return score
+
+
+class Game():
+    """
+    An m,n,k game with its search settings.
+
+    `heuristic(game, me, them)` scores a position for the player to
+    move, whose marks are `me`, from the bitboards of both players; its
+    scores must stay well below WIN. `budget` is the number of seconds
+    `minimax` may spend on a move.
+    """
+
+    X = "X"
+    O = "O"
+    EMPTY = None
+
+    def __init__(self, rows=3, cols=3, k=3, heuristic=line_heuristic,
+                 budget=DEFAULT_BUDGET):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.heuristic = heuristic
+        self.budget = budget
+        self.full = (1 << rows * cols) - 1
+        self.wins = bitboard.lines(rows, cols, k)
+        self.wins_through = bitboard.lines_through(rows, cols, self.wins)
+
+        # Cells nearest the center first, which is the static move order
+        center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+        self.order = sorted(range(rows * cols), key=lambda cell: (
+            max(abs(cell // cols - center_i), abs(cell % cols - center_j)), cell
+        ))
+        self.nearby = None
+        if rows * cols > NEARBY_AFTER:
+            self.nearby = [self.area(cell, NEARBY) for cell in range(rows * cols)]
+
+        self.table = {}
+        self.deadline = None
+
+    def area(self, cell, distance):
+        """Returns the mask of cells at most `distance` away from a cell."""
+        i, j = divmod(cell, self.cols)
+        mask = 0
+        for other_i in range(max(0, i - distance), min(self.rows, i + distance + 1)):
+            for other_j in range(max(0, j - distance), min(self.cols, j + distance + 1)):
+                mask |= 1 << other_i * self.cols + other_j
+        return mask
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[self.EMPTY] * self.cols for _ in range(self.rows)]
+
+    def masks(self, board):
+        """Returns the (x, o) bitboards of a list-of-lists board."""
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == self.X:
+                    x |= 1 << i * self.cols + j
+                elif cell == self.O:
+                    o |= 1 << i * self.cols + j
+        return x, o
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.masks(board)
+        return self.X if x.bit_count() == o.bit_count() else self.O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.rows) for j in range(self.cols)
+                if board[i][j] is self.EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols) or board[i][j] is not self.EMPTY:
+            raise ValueError("Invalid move")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.masks(board)
+        if any(x & line == line for line in self.wins):
+            return self.X
+        if any(o & line == line for line in self.wins):
+            return self.O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.masks(board)
+        return (x | o) == self.full or self.winner(board) is not None
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {self.X: 1, self.O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player within the
+        game's time budget.
+        """
+        return self.best_move(board)
+
+    def stop(self):
+        """
+        Makes a search running in another thread return at once, with
+        the best move of the deepest search it finished.
+        """
+        self.deadline = -math.inf
+
+    def best_move(self, board, budget=None, stats=None):
+        """
+        Returns the best action (i, j) found for the current player, or
+        None if the game is over.
+
+        3,3,3 games are answered from the opening book when it has been
+        built. Otherwise searches one ply deeper at a time until `budget`
+        seconds (the game's budget by default) have passed, and returns
+        the best move of the deepest search that finished. Stops early
+        once the result is proven. If `stats` is a dictionary,
+        stats["nodes"] counts the positions searched and stats["depth"]
+        is the depth reached.
+        """
+        if stats is not None:
+            stats.setdefault("nodes", 0)
+            stats["depth"] = 0
+        if self.terminal(board):
+            return None
+        if (self.rows, self.cols, self.k) == (bitboard.ROWS, bitboard.COLS, bitboard.K):
+            entry = book.lookup(board)
+            if entry is not None:
+                return entry[0]
+        x, o = self.masks(board)
+        me, them = (x, o) if self.player(board) == self.X else (o, x)
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+
+        if budget is None:
+            budget = self.budget
+        self.deadline = time.perf_counter() + budget
+        empty = (self.full & ~(x | o)).bit_count()
+        best_cell = None
+        try:
+            for depth in range(1, empty + 1):
+                cell, score = self.search_root(me, them, depth, best_cell, stats)
+                best_cell = cell
+                if stats is not None:
+                    stats["depth"] = depth
+                if abs(score) >= WIN:
+                    break
+        except OutOfTime:
+            pass
+        finally:
+            self.deadline = None
+
+        if best_cell is None:
+            # Out of time before even one ply: play the first sensible move
+            best_cell = next(iter(self.candidates(me, them)))
+        return divmod(best_cell, self.cols)
+
+    def search_root(self, me, them, depth, first, stats):
+        """
+        Returns the best cell and its score for the player to move,
+        searching `depth` plies and trying `first` before other moves.
+        """
+        alpha = -math.inf
+        best_cell = None
+        for cell in self.candidates(me, them, first):
+            score = self.score_move(me, them, cell, depth, -math.inf, -alpha, stats)
+            if score > alpha:
+                alpha, best_cell = score, cell
+        return best_cell, alpha
+
+    def score_move(self, me, them, cell, depth, alpha, beta, stats):
+        """Returns the score for `me` of playing `cell`."""
+        mine = me | 1 << cell
+        if any(mine & line == line for line in self.wins_through[cell]):
+            return WIN + (self.full & ~(mine | them)).bit_count()
+        return -self.negamax(them, mine, depth - 1, -beta, -alpha, stats)
+
+    def negamax(self, me, them, depth, alpha, beta, stats):
+        """
+        Returns the score of a position for the player to move (`me`),
+        whose opponent has not won, searched `depth` plies deep. Scores
+        outside the (alpha, beta) window are only bounds.
+        """
+        if stats is not None:
+            stats["nodes"] += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise OutOfTime
+
+        if (me | them) == self.full:
+            return 0
+        key = (me, them)
+        value, hint = bitboard.probe(self.table, key, alpha, beta, depth)
+        if value is not None:
+            return value
+        if depth == 0:
+            return max(-WIN // 2, min(WIN // 2, self.heuristic(self, me, them)))
+
+        window = (alpha, beta)
+        best_score = -math.inf
+        best_cell = None
+        for cell in self.candidates(me, them, hint):
+            score = self.score_move(me, them, cell, depth, alpha, beta, stats)
+            if score > best_score:
+                best_score, best_cell = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        bitboard.store(self.table, key, best_score, window, best_cell, depth)
+        return best_score
+
+    def candidates(self, me, them, first=None):
+        """
+        Returns the cells worth trying, `first` first and then nearest
+        the center first. On large boards only cells near a mark count.
+        """
+        occupied = me | them
+        open_cells = self.full & ~occupied
+        if self.nearby is not None and occupied:
+            near = 0
+            remaining = occupied
+            while remaining:
+                bit = remaining & -remaining
+                near |= self.nearby[bit.bit_length() - 1]
+                remaining ^= bit
+            open_cells &= near
+        cells = [cell for cell in self.order if open_cells >> cell & 1]
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
@@ -1,9 +1,17 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import mnk
 import tictactoe as ttt
 
+# python runner.py [rows cols k] plays an m,n,k game instead of Tic Tac Toe
+if len(sys.argv) == 4:
+    ttt = mnk.Game(*(int(arg) for arg in sys.argv[1:]))
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [rows cols k]")
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -15,16 +23,33 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
-user = None
 board = ttt.initial_state()
-ai_turn = False
+rows, cols = len(board), len(board[0])
+tile_size = min(80, 260 // max(rows, cols))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+user = None
+
+# The computer picks its moves in a worker thread, so the window keeps
+# drawing and answering clicks while it thinks
+thinker = ThreadPoolExecutor(max_workers=1)
+thinking = None
+clock = pygame.time.Clock()
+
+
+def stop_thinking():
+    """Cancels the computer's move, stopping a search already running."""
+    if thinking is not None and not thinking.cancel() and isinstance(ttt, mnk.Game):
+        ttt.stop()
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            stop_thinking()
+            thinker.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -67,13 +92,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -102,7 +126,8 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = int(time.time() * 3) % 4
+            title = "Computer thinking" + "." * dots + " " * (3 - dots)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,37 +135,37 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if thinking is None:
+                thinking = thinker.submit(ttt.minimax, board)
+            elif thinking.done():
+                board = ttt.result(board, thinking.result())
+                thinking = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Play again once the game is over, or restart it at any time
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Restart", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                stop_thinking()
+                thinking = None
+                user = None
+                board = ttt.initial_state()
 
     pygame.display.flip()
+    clock.tick(30)
@@ -4,10 +4,43 @@ Tic Tac Toe Player
 
 import math
 
+import bitboard
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 symmetries of the board (rotations and reflections), each listing
+# the cell, numbered 0-8 row by row, that lands in cells 0-8
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Values of the positions searched so far, keyed by canonical form. A
+# position's value does not depend on how it was reached, so the table
+# is kept between moves (and games) and only ever grows.
+transpositions = {}
+
+# Alpha-beta's table: canonical form -> entry as in bitboard.store(), with
+# the best move a cell in the canonical form's numbering
+bounds = {}
+
+# Move ordering for alpha-beta: center, corners, then edges
+STATIC_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Moves that caused cutoffs: the last two per number of moves played,
+# and a score per move weighted by how much each cutoff saved
+killers = {}
+history = {}
+
 
 def initial_state():
     """
@@ -109,62 +142,210 @@ def utility(board):
         return -1
 
 
-def minimax1(board):
+def canonical(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns a key shared by a board and all its rotations and reflections.
     """
-    turn= player(board)
+    return canonical_symmetry(board)[0]
 
-    check_winner= winner(board)
-    if check_winner is not None:
-        return utility(board)
 
-    if terminal(board) == True:
-        return utility(board)
+def canonical_symmetry(board):
+    """
+    Returns the canonical key of a board and the symmetry that maps the
+    board onto it: cell c of the key is cell symmetry[c] of the board.
+    """
+    cells = "".join(cell or "-" for row in board for cell in row)
+    return min(("".join(cells[i] for i in symmetry), symmetry)
+               for symmetry in SYMMETRIES)
+
 
-    if turn=='X':
-        best_score= -float('inf')
+def minimax1(board, stats=None):
+    """
+    Returns the value of the board under optimal play: 1 if X wins,
+    -1 if O wins, 0 for a tie.
+    """
+    key = canonical(board)
+    if key in transpositions:
+        return transpositions[key]
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+
+    if terminal(board):
+        best_score = utility(board)
+    elif player(board) == 'X':
+        best_score = -math.inf
         for action in actions(board):
-            new_board = result(board,action)
-            score= minimax1(new_board)
-            best_score= max(score,best_score)
-        return best_score
+            best_score = max(minimax1(result(board, action), stats), best_score)
     else:
-        best_score= float('inf')
+        best_score = math.inf
         for action in actions(board):
-            new_board = result(board,action)
-            score= minimax1(new_board)
-            best_score= min(score, best_score)
-        return best_score
+            best_score = min(minimax1(result(board, action), stats), best_score)
+    transpositions[key] = best_score
+    return best_score
 
-def minimax(board):
+
+def minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Positions in the opening book (see book.py) are answered with a
+    single lookup; others are searched on bitboards (see bitboard.py).
+    """
     if terminal(board):
         return None
-    turn= player(board)
+    entry = book.lookup(board)
+    if entry is not None:
+        if stats is not None:
+            stats.setdefault("nodes", 0)
+        return entry[0]
+    return bitboard.minimax(board, stats)
 
-    if turn== 'X':
-        best_move= None
-        best_score= -float('inf')
-        for action in actions(board):
-            new_board = result(board,action)
-            score= minimax1(new_board)
-            if terminal(new_board):
-                return None
-            if score > best_score:
-                best_score = score
-                best_move= action
-        return best_move
 
-    if turn== 'O':
-        best_move= None
-        best_score= float('inf')
-        for action in actions(board):
-            new_board = result(board,action)
-            score= minimax1(new_board)
-            if terminal(new_board):
-                return None
+def list_search(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    found by searching the list-of-lists boards themselves. Kept to
+    compare the engines against.
+
+    If `stats` is a dictionary, stats["nodes"] counts the positions
+    searched (positions already in the transposition table are free).
+    """
+    if stats is not None:
+        stats.setdefault("nodes", 0)
+    if terminal(board):
+        return None
+    turn = player(board)
+
+    best_move = None
+    best_score = -math.inf if turn == 'X' else math.inf
+    for action in actions(board):
+        score = minimax1(result(board, action), stats)
+        if (score > best_score) if turn == 'X' else (score < best_score):
+            best_score = score
+            best_move = action
+    return best_move
+
+
+def alphabeta(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    using alpha-beta search.
+
+    Moves at the root are tried in the same order as search tries them
+    and a later move only replaces an earlier one if it is strictly
+    better, so both return the same move. If `stats` is a dictionary,
+    stats["nodes"] counts the positions searched.
+    """
+    if stats is not None:
+        stats.setdefault("nodes", 0)
+    if terminal(board):
+        return None
+    turn = player(board)
+    # Nothing beats a win, so the search can stop at the first one
+    best_possible = 1 if turn == 'X' else -1
+
+    best_move = None
+    best_score = -math.inf if turn == 'X' else math.inf
+    for action in actions(board):
+        if turn == 'X':
+            score = alphabeta1(result(board, action), best_score, math.inf, stats)
+            better = score > best_score
+        else:
+            score = alphabeta1(result(board, action), -math.inf, best_score, stats)
+            better = score < best_score
+        if better:
+            best_score = score
+            best_move = action
+            if best_score == best_possible:
+                break
+    return best_move
+
+
+def alphabeta1(board, alpha, beta, stats=None):
+    """
+    Returns the value of the board if it lies strictly between alpha and
+    beta. Otherwise returns a bound that is at most alpha or at least
+    beta, on the same side as the value.
+    """
+    key, symmetry = canonical_symmetry(board)
+    value, hint = bitboard.probe(bounds, key, alpha, beta)
+    if value is not None:
+        return value
+    if hint is not None:
+        hint = divmod(symmetry[hint], 3)
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+
+    if terminal(board):
+        bitboard.store(bounds, key, utility(board), (-math.inf, math.inf), None)
+        return utility(board)
+
+    turn = player(board)
+    window = (alpha, beta)
+    moves = ordered_actions(board, hint)
+    best_move = None
+    best_score = -math.inf if turn == 'X' else math.inf
+    for action in moves:
+        score = alphabeta1(result(board, action), alpha, beta, stats)
+        if turn == 'X':
+            if score > best_score:
+                best_score, best_move = score, action
+            alpha = max(alpha, score)
+        else:
             if score < best_score:
-                best_score = score
-                best_move= action
-        return best_move
+                best_score, best_move = score, action
+            beta = min(beta, score)
+        if alpha >= beta:
+            record_cutoff(action, 9 - len(moves), len(moves))
+            break
+
+    cell = symmetry.index(3 * best_move[0] + best_move[1])
+    bitboard.store(bounds, key, best_score, window, cell)
+    return best_score
+
+
+def ordered_actions(board, hint=None):
+    """
+    Returns the actions available on the board, most promising first:
+    the best move found on an earlier visit, killer moves for this
+    ply, moves with the best history, then center, corners and edges.
+    """
+    moves = actions(board)
+    killer = killers.get(9 - len(moves), [])
+    return sorted(moves, key=lambda action: (
+        action != hint,
+        action not in killer,
+        -history.get(action, 0),
+        STATIC_ORDER.index(action)
+    ))
+
+
+def record_cutoff(action, ply, remaining):
+    """
+    Remembers a move that caused a cutoff with `remaining` moves left.
+    """
+    killer = killers.setdefault(ply, [])
+    if action not in killer:
+        killer.insert(0, action)
+        del killer[2:]
+    history[action] = history.get(action, 0) + remaining * remaining
+
+
+def clear_tables():
+    """
+    Empties the tables searches share, so a search starts from scratch.
+    """
+    transpositions.clear()
+    bounds.clear()
+    killers.clear()
+    history.clear()
+    bitboard.table.clear()
+
 
+# Engines that pick a move for a board, by name
+ENGINES = {
+    "book": minimax,
+    "minimax": list_search,
+    "alphabeta": alphabeta,
+    "bitboard": bitboard.minimax,
+}
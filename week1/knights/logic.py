@@ -1,5 +1,20 @@
 import itertools
 
+import sat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Parentheses a compiled expression may nest before a subformula is
+# computed in a local variable instead
+MAX_NESTING = 50
+
+# The bitset engine evaluates 2 ** CHUNK_BITS models at a time
+CHUNK_BITS = 20
+WORD_BITS = 64
+
 
 class Sentence():
 
@@ -7,6 +22,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave some
+        symbols unassigned. Returns True or False if the assigned symbols
+        already decide the sentence, and None if they do not.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -15,6 +38,13 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def compile(self, symbols, partial=False):
+        """
+        Returns a function that evaluates the sentence from a sequence
+        of values, one for each symbol in `symbols`; see compile_sentences.
+        """
+        return compile_sentences([self], symbols, partial)
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -62,6 +92,10 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
@@ -86,6 +120,10 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -120,6 +158,16 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -151,6 +199,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -183,6 +241,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -211,10 +280,16 @@ class Biconditional(Sentence):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
@@ -225,39 +300,568 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+class CNF():
+    """
+    Sentences in conjunctive normal form, as clauses for sat.Solver.
+
+    Symbols are numbered from 1 in the order they are first seen, and a
+    literal is a symbol's number, or its negation for the symbol being
+    false. Compound subformulas are replaced by new variables defined to
+    be equivalent to them (the Tseitin encoding), so the clauses grow
+    linearly with the sentences even through Biconditional and
+    Implication. Subformulas that repeat share one variable.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        self.count = 0
+        self.clauses = []
+        self.literals = dict()
+
+    def variable(self, name):
+        """Returns the variable of a symbol."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            self.clauses.append([-left, right])
+            self.clauses.append([left, -right])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, And):
+            self.clauses.append([-self.literal(conjunct)
+                                 for conjunct in sentence.operand.conjuncts])
         else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when the sentence is,
+        adding the clauses that define it.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+        else:
+            raise TypeError("must be a logical sentence")
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        self.count += 1
+        x = self.count
+        if isinstance(sentence, And):
+            # x => every conjunct, and all conjuncts => x
+            self.clauses.extend([-x, part] for part in parts)
+            self.clauses.append([x] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            # x => some disjunct, and every disjunct => x
+            self.clauses.append([-x] + parts)
+            self.clauses.extend([x, -part] for part in parts)
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-x, -antecedent, consequent])
+            self.clauses.append([x, antecedent])
+            self.clauses.append([x, -consequent])
+        else:
+            self.clauses.append([-x, -left, right])
+            self.clauses.append([-x, left, -right])
+            self.clauses.append([x, left, right])
+            self.clauses.append([x, -left, -right])
+        self.literals[sentence] = x
+        return x
+
+
+def compile_sentences(sentences, symbols, partial=False):
+    """
+    Returns a function that evaluates sentences much faster than walking
+    their trees. It takes a sequence of values whose slot i holds the
+    value of symbols[i], and returns the value of the sentence, or a
+    tuple of values if several sentences were given.
+
+    Values are bools, or with `partial` ints in three-valued logic: 1
+    for true, -1 for false and 0 for unknown.
+
+    The function is generated Python code, one expression per sentence
+    that stops as soon as its value is known, like `and` and `or` do.
+    Subformulas that occur more than once are computed once beforehand.
+    """
+    slots = {name: slot for slot, name in enumerate(symbols)}
+
+    # Count the occurrences of every subformula to find the shared ones
+    counts = dict()
+    stack = list(sentences)
+    while stack:
+        sentence = stack.pop()
+        counts[sentence] = counts.get(sentence, 0) + 1
+        if counts[sentence] == 1:
+            stack.extend(parts(sentence))
+
+    names = dict()
+    lines = []
+    temporaries = itertools.count()
+
+    def expression(sentence):
+        """
+        Returns Python code for the value of a subformula, and how deeply
+        it nests parentheses.
+        """
+        if sentence in names:
+            return names[sentence], 0
+        if isinstance(sentence, Symbol):
+            if sentence.name not in slots:
+                raise Exception(f"variable {sentence.name} has no slot")
+            return f"values[{slots[sentence.name]}]", 0
+
+        compiled = [expression(part) for part in parts(sentence)]
+        codes = [code for code, _ in compiled]
+        depth = max((depth for _, depth in compiled), default=0) + 1
+        if isinstance(sentence, Not):
+            code = f"-{codes[0]}" if partial else f"not {codes[0]}"
+        elif isinstance(sentence, Biconditional):
+            code = "{} * {}" if partial else "{} == {}"
+            code = code.format(*codes)
+        elif not partial:
+            if isinstance(sentence, And):
+                code = " and ".join(codes) or "True"
+            elif isinstance(sentence, Or):
+                code = " or ".join(codes) or "False"
+            else:
+                code = "not {} or {}".format(*codes)
+        else:
+            # And is false once a part is false and Or true once a part is
+            # true; otherwise they are unknown if a part is, and decided if not
+            if isinstance(sentence, Implication):
+                codes = [f"-{codes[0]}", codes[1]]
+            stop = -1 if isinstance(sentence, And) else 1
+            kept = [f"t{next(temporaries)}" for _ in codes]
+            first = " or ".join(f"({temporary} := {code}) == {stop}"
+                                for temporary, code in zip(kept, codes))
+            second = " or ".join(f"{temporary} == 0" for temporary in kept)
+            code = f"{stop} if {first or False} else 0 if {second or False} else {-stop}"
+
+        # Shared and deeply nested subformulas go in local variables
+        if counts.get(sentence, 0) > 1 or depth > MAX_NESTING:
+            names[sentence] = f"v{len(names)}"
+            lines.append(f"    {names[sentence]} = {code}")
+            return names[sentence], 0
+        return f"({code})", depth
+
+    results = [expression(sentence)[0] for sentence in sentences]
+    if len(results) == 1:
+        lines.append(f"    return {results[0]}")
+    else:
+        lines.append(f"    return ({', '.join(results)},)")
+    namespace = dict()
+    exec("def evaluate(values):\n" + "\n".join(lines), namespace)
+    return namespace["evaluate"]
+
+
+def parts(sentence):
+    """Returns the sentences a sentence is made of."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return []
+
+
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query, with one of the ENGINES.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    return ENGINES[engine](knowledge, query)
+
+
+def enumerate_check(knowledge, query):
+    """Checks if knowledge base entails query by enumerating models."""
+
+    # Symbols are assigned on one list of three-valued slots that is
+    # undone as the search backtracks
+    symbols, evaluate, scopes = prepare_search(knowledge, [query])
+    values = [0] * len(symbols)
+
+    def check_all(knowledge_true):
+        """
+        Checks if knowledge base entails query, in every model that
+        extends the current assignment.
+        """
+        *conjuncts, decided = evaluate(values)
+
+        # If knowledge base is false however the rest is assigned, no
+        # model here can contradict the query
+        if not knowledge_true:
+            known = min(conjuncts)
+            if known == -1:
+                return True
+            knowledge_true = known == 1
+
+        # If the query is already decided, so is entailment, unless the
+        # query is false and it is still open whether knowledge base holds
+        if decided == 1:
+            return True
+        if decided == -1 and knowledge_true:
+            return False
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+        # Assign the next symbol both ways, undoing each assignment after
+        if knowledge_true:
+            undecided = [len(conjuncts)]
+        else:
+            undecided = [i for i, value in enumerate(conjuncts) if value == 0]
+        slot = next_symbol(values, scopes, undecided)
+        for value in (1, -1):
+            values[slot] = value
+            entailed = check_all(knowledge_true)
+            values[slot] = 0
+            if not entailed:
+                return False
+        return True
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_all(False)
+
+
+def prepare_search(knowledge, sentences):
+    """
+    Prepares a search over the models of knowledge base and other
+    sentences, as in enumerate_check. Returns (symbols, evaluate,
+    scopes): evaluate, compiled as by compile_sentences over slots for
+    `symbols`, returns the value of each conjunct of knowledge base and
+    then of each sentence, and scopes[i] lists the slots of the symbols
+    in the i-th of those.
+    """
+    conjuncts = []
+    stack = [knowledge]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, And):
+            stack.extend(reversed(sentence.conjuncts))
+        else:
+            conjuncts.append(sentence)
+    if not conjuncts:
+        conjuncts = [knowledge]
+
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[sentence.symbols() for sentence in sentences]))
+    slots = {name: slot for slot, name in enumerate(symbols)}
+    checked = conjuncts + list(sentences)
+    evaluate = compile_sentences(checked, symbols, partial=True)
+    scopes = [sorted(slots[name] for name in sentence.symbols())
+              for sentence in checked]
+    return symbols, evaluate, scopes
+
+
+def next_symbol(values, scopes, undecided):
+    """
+    Returns the slot to assign next: an unassigned symbol of the
+    undecided sentence (given as indexes into `scopes`) with the fewest
+    unassigned symbols. Sentences are then decided, and branches pruned,
+    as early as possible, whatever the symbols are named.
+    """
+    best = None
+    for i in undecided:
+        free = [slot for slot in scopes[i] if values[slot] == 0]
+        if free and (best is None or len(free) < len(best)):
+            best = free
+            if len(best) == 1:
+                break
+    return best[0]
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by showing, with the SAT
+    solver, that knowledge base and the negated query have no model.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    negated = -cnf.literal(query)
+    return not sat.Solver(cnf.clauses).solve([negated])
+
+
+def bitset_check(knowledge, query):
+    """
+    Checks if knowledge base entails query from the truth tables of
+    both, as bitsets over every model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    for _, full, (known, entailed) in bitset_chunks([knowledge, query], symbols):
+        if any_set(known & (entailed ^ full)):
+            return False
+    return True
+
+
+def bitset_models(knowledge, query):
+    """
+    Checks if knowledge base entails query, like bitset_check, and
+    finds every model of knowledge base on the way. Returns (entailed,
+    models), where models is a list of dictionaries from symbol to bool.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    entailed = True
+    models = []
+    for first, full, (known, true) in bitset_chunks([knowledge, query], symbols):
+        if any_set(known & (true ^ full)):
+            entailed = False
+        for number in set_bits(known):
+            number += first
+            models.append({symbol: bool(number >> i & 1)
+                           for i, symbol in enumerate(symbols)})
+    return entailed, models
+
+
+def bitset_chunks(sentences, symbols):
+    """
+    Yields the truth tables of sentences over every model of `symbols`,
+    up to 2 ** CHUNK_BITS models at a time. Model number m is the one
+    where symbols[i] is true if bit i of m is set.
+
+    Each chunk is (first, full, tables): the number of its first model,
+    the value with every bit set, and one table per sentence, with bit
+    m - first set if the sentence is true in model m. Tables are NumPy
+    arrays of 64-bit words if NumPy is installed, and ints otherwise.
+    """
+    low = min(len(symbols), CHUNK_BITS)
+    size = 1 << low
+    if np is not None and size >= WORD_BITS:
+        # The first symbols change within a word, the others across words
+        full = np.uint64((1 << WORD_BITS) - 1)
+        words = np.arange(size // WORD_BITS, dtype=np.uint64)
+        inside = WORD_BITS.bit_length() - 1
+        columns = [np.full(len(words), bit_column(i, WORD_BITS), dtype=np.uint64)
+                   for i in range(inside)]
+        columns += [(words >> np.uint64(i - inside) & np.uint64(1)) * full
+                    for i in range(inside, low)]
+    else:
+        full = (1 << size) - 1
+        columns = [bit_column(i, size) for i in range(low)]
+    zero = full ^ full
+
+    for chunk in range(1 << len(symbols) - low):
+        # Symbols past the first `low` are the same in the whole chunk
+        slots = columns + [full if chunk >> i & 1 else zero
+                           for i in range(len(symbols) - low)]
+        slots = dict(zip(symbols, slots))
+        tables = dict()
+
+        def table(sentence):
+            """Returns the truth table of a sentence in this chunk."""
+            if sentence in tables:
+                return tables[sentence]
+            if isinstance(sentence, Symbol):
+                value = slots[sentence.name]
+            elif isinstance(sentence, Not):
+                value = table(sentence.operand) ^ full
+            elif isinstance(sentence, And):
+                value = full
+                for conjunct in sentence.conjuncts:
+                    value = value & table(conjunct)
+            elif isinstance(sentence, Or):
+                value = zero
+                for disjunct in sentence.disjuncts:
+                    value = value | table(disjunct)
+            elif isinstance(sentence, Implication):
+                value = (table(sentence.antecedent) ^ full) | table(sentence.consequent)
+            elif isinstance(sentence, Biconditional):
+                value = table(sentence.left) ^ table(sentence.right) ^ full
+            else:
+                raise TypeError("must be a logical sentence")
+            tables[sentence] = value
+            return value
+
+        results = [table(sentence) for sentence in sentences]
+        if np is not None and isinstance(full, np.uint64):
+            results = [np.broadcast_to(result, (size // WORD_BITS,)) for result in results]
+        yield chunk << low, full, results
+
+
+def bit_column(bit, size):
+    """
+    Returns the int whose bit m, for each m below `size` (a power of
+    two), is set if bit `bit` of m is.
+    """
+    period = 1 << bit
+    column = ((1 << period) - 1) << period
+    width = 2 * period
+    while width < size:
+        column |= column << width
+        width *= 2
+    return column
+
+
+def any_set(table):
+    """Returns True if a truth table has any bit set."""
+    if np is not None and isinstance(table, np.ndarray):
+        return bool(table.any())
+    return bool(table)
+
+
+def set_bits(table):
+    """Returns the numbers of the bits set in a truth table, in order."""
+    if np is not None and isinstance(table, np.ndarray):
+        bits = np.unpackbits(table.astype("<u8").view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits).tolist()
+    digits = bin(table)[:1:-1]
+    return [i for i, digit in enumerate(digits) if digit == "1"]
+
+
+# What knowledge base says about a query, from check_queries
+ENTAILED = "entailed"
+CONTRADICTED = "contradicted"
+UNDETERMINED = "undetermined"
+
+
+def check_queries(knowledge, queries, engine="enumerate"):
+    """
+    Checks what knowledge base says about each query, looking at its
+    models once for all of them, with one of the QUERY_ENGINES. Returns
+    a list with, for each query, ENTAILED if it is true in every model
+    of knowledge base, CONTRADICTED if it is false in every one and
+    UNDETERMINED otherwise. Every query is entailed by a knowledge base
+    that has no models, as with model_check.
+    """
+    if engine not in QUERY_ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    queries = list(queries)
+
+    # possible[i] holds the values query i takes in models of knowledge
+    possible = [set() for _ in queries]
+    if queries:
+        QUERY_ENGINES[engine](knowledge, queries, possible)
+    return [CONTRADICTED if values == {False}
+            else UNDETERMINED if len(values) == 2
+            else ENTAILED
+            for values in possible]
+
+
+def enumerate_queries(knowledge, queries, possible):
+    """
+    Adds to `possible` the values of the queries in models of knowledge
+    base, with one search over the models like enumerate_check's.
+    """
+    symbols, evaluate, scopes = prepare_search(knowledge, queries)
+    values = [0] * len(symbols)
+    open_queries = set(range(len(queries)))
+    first = len(scopes) - len(queries)
+
+    def check_all():
+        """
+        Adds the values of the queries still open in models that extend
+        the current assignment.
+        """
+        results = evaluate(values)
+        conjuncts, decided = results[:first], results[first:]
+        known = min(conjuncts)
+        if known == -1:
+            return
+
+        # In a model of knowledge base, record every query it decides, and
+        # stop once nothing is left open
+        if known == 1:
+            for i in list(open_queries):
+                if decided[i] != 0:
+                    possible[i].add(decided[i] == 1)
+                    if len(possible[i]) == 2:
+                        open_queries.discard(i)
+            if all(decided[i] != 0 for i in open_queries):
+                return
+
+        if known == 1:
+            undecided = [first + i for i in open_queries if decided[i] == 0]
+        else:
+            undecided = [i for i, value in enumerate(conjuncts) if value == 0]
+        slot = next_symbol(values, scopes, undecided)
+        for value in (1, -1):
+            if not open_queries:
+                return
+            values[slot] = value
+            check_all()
+            values[slot] = 0
+
+    check_all()
+
+
+def sat_queries(knowledge, queries, possible):
+    """
+    Adds to `possible` the values of the queries in models of knowledge
+    base, solving for a model only when no model found so far gives a
+    query the value sought.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    solver = sat.Solver(cnf.clauses)
+    solver.reserve(cnf.count)
+
+    def record(model):
+        for i, literal in enumerate(literals):
+            possible[i].add(model[abs(literal)] == (literal > 0))
+
+    if not solver.solve():
+        return
+    record(solver.model)
+    for i, literal in enumerate(literals):
+        for value in (True, False):
+            if value not in possible[i] and solver.solve([literal if value else -literal]):
+                record(solver.model)
+
+
+def bitset_queries(knowledge, queries, possible):
+    """
+    Adds to `possible` the values of the queries in models of knowledge
+    base, from truth tables computed together with bitset_chunks.
+    """
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+    for _, full, (known, *tables) in bitset_chunks([knowledge] + queries, symbols):
+        for i, table in enumerate(tables):
+            if any_set(known & table):
+                possible[i].add(True)
+            if any_set(known & (table ^ full)):
+                possible[i].add(False)
+
+
+# Ways model_check can decide entailment
+ENGINES = {
+    "enumerate": enumerate_check,
+    "sat": sat_check,
+    "bitset": bitset_check,
+}
+
+# Ways check_queries can look at the models of knowledge base
+QUERY_ENGINES = {
+    "enumerate": enumerate_queries,
+    "sat": sat_queries,
+    "bitset": bitset_queries,
+}
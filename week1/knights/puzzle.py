@@ -82,8 +82,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            results = check_queries(knowledge, symbols)
+            for symbol, result in zip(symbols, results):
+                if result == ENTAILED:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,324 @@
+"""
+A small CDCL SAT solver.
+
+Clauses are lists of nonzero ints in DIMACS style: variable v appears as
+v when it must be true and as -v when it must be false. The solver uses
+unit propagation over two watched literals per clause, learns a clause
+from every conflict (first unique implication point) and jumps back to
+the level where that clause becomes unit. Decisions pick the variable
+most active in recent conflicts and try the value it last had. Once
+enough clauses have been learned, the half spanning the most decision
+levels is deleted, except short-span ("glue") clauses and those that
+are the reason for a current assignment.
+
+Solving can be repeated under different assumptions; clauses learned in
+one call remain valid for the next.
+"""
+
+import heapq
+
+# Conflicts before the first restart; each later restart waits longer
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# How much more a variable's activity counts after each conflict
+ACTIVITY_DECAY = 0.95
+
+# Learned clauses kept before the first clean-up; each later clean-up
+# waits for this many more
+REDUCE_FIRST = 500
+REDUCE_GROWTH = 100
+
+# Learned clauses spanning at most this many decision levels are kept
+GLUE = 2
+
+
+class Solver():
+
+    def __init__(self, clauses=()):
+        self.count = 0
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.order = []
+        self.watches = {}
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.learned_clauses = []
+        self.reduce_limit = REDUCE_FIRST
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def reserve(self, variable):
+        """Makes room for variables up to `variable`."""
+        while self.count < variable:
+            self.count += 1
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.phases.append(False)
+            self.activity.append(0.0)
+            self.watches[self.count] = []
+            self.watches[-self.count] = []
+            heapq.heappush(self.order, (0.0, self.count))
+
+    def value(self, literal):
+        """Returns 1 if a literal is true, -1 if it is false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        literals = []
+        for literal in clause:
+            self.reserve(abs(literal))
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                return True
+            if value == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(literals)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        with all its literals false, or None if there is no conflict.
+        """
+        # self.value inlined, as this loop is where solving spends its time
+        values = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            self.watches[false] = kept = []
+            for i, clause in enumerate(watching):
+                # Keep the literal that just became false at clause[1]
+                first = clause[0]
+                if first == false:
+                    first = clause[0] = clause[1]
+                    clause[1] = false
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    if (values[other] if other > 0 else -values[-other]) != -1:
+                        clause[1], clause[k] = other, false
+                        self.watches[other].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watching[i + 1:])
+                        return clause
+                    self.assign(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal to
+        assert first, and the level to jump back to.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the most recent literal of this level in the clause
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        back = 0
+        if len(learned) > 1:
+            # The deepest other literal is watched, so it wakes the clause
+            deepest = max(range(1, len(learned)),
+                          key=lambda i: self.levels[abs(learned[i])])
+            learned[1], learned[deepest] = learned[deepest], learned[1]
+            back = self.levels[abs(learned[1])]
+        self.increment /= ACTIVITY_DECAY
+        return learned, back
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, self.count + 1)]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Undoes every assignment made above `level`."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+        # Stale heap entries pile up; rebuild the heap once they dominate
+        if len(self.order) > 8 * self.count + 64:
+            self.order = [(-self.activity[v], v) for v in range(1, self.count + 1)
+                          if self.values[v] == 0]
+            heapq.heapify(self.order)
+
+    def reduce(self):
+        """
+        Deletes the learned clauses spanning the most decision levels,
+        up to half of them, keeping glue clauses and the reason for any
+        current assignment.
+        """
+        # The newest clauses come first among those with the same span
+        ranked = sorted(reversed(self.learned_clauses), key=lambda entry: entry[0])
+        kept = []
+        deleted = set()
+        for i, (span, clause) in enumerate(ranked):
+            if (i < len(ranked) // 2 or span <= GLUE
+                    or self.reasons[abs(clause[0])] is clause):
+                kept.append((span, clause))
+            else:
+                deleted.add(id(clause))
+        if deleted:
+            for literal, watching in self.watches.items():
+                self.watches[literal] = [clause for clause in watching
+                                         if id(clause) not in deleted]
+        self.learned_clauses = kept
+        self.reduce_limit += REDUCE_GROWTH
+
+    def decide(self):
+        """Returns the next unassigned variable to branch on, or None."""
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if self.values[variable] == 0:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses and the assumed literals can all be
+        true together, leaving a satisfying assignment in `model` (a
+        dictionary from variable to bool), and False otherwise.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        for literal in assumptions:
+            self.reserve(abs(literal))
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, back = self.analyze(conflict)
+                span = len({self.levels[abs(literal)] for literal in learned})
+                self.backtrack(back)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                    self.learned_clauses.append((span, learned))
+                continue
+
+            if len(self.learned_clauses) >= self.reduce_limit:
+                self.reduce()
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart *= RESTART_GROWTH
+                self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one level each
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = {v: self.values[v] == 1 for v in range(1, self.count + 1)}
+                self.backtrack(0)
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
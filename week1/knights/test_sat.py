@@ -0,0 +1,106 @@
+"""
+Checks the SAT solver against brute force on small random CNFs.
+
+Usage: python -m unittest test_sat (or pytest)
+"""
+
+import itertools
+import random
+import unittest
+
+import sat
+
+
+def random_cnf(rng, count, size=None):
+    """
+    Returns random clauses over `count` variables: of one to four
+    literals, or with `size`, random k-SAT near the satisfiability
+    threshold, where solving takes the most conflicts.
+    """
+    if size is not None:
+        lengths = [size] * int(4.3 * count)
+    else:
+        lengths = [rng.randrange(1, min(count, 4) + 1)
+                   for _ in range(rng.randrange(1, 5 * count))]
+    return [[variable if rng.random() < 0.5 else -variable
+             for variable in rng.sample(range(1, count + 1), length)]
+            for length in lengths]
+
+
+def brute_force(clauses, count, assumptions=()):
+    """Returns True if some assignment satisfies the clauses and assumptions."""
+    for values in itertools.product((False, True), repeat=count):
+        if all(values[abs(literal) - 1] == (literal > 0) for literal in assumptions) \
+                and all(any(values[abs(literal) - 1] == (literal > 0) for literal in clause)
+                        for clause in clauses):
+            return True
+    return False
+
+
+def satisfies(model, clauses):
+    return all(any(model[abs(literal)] == (literal > 0) for literal in clause)
+               for clause in clauses)
+
+
+class SolverTest(unittest.TestCase):
+
+    def check(self, seed, size=None):
+        rng = random.Random(seed)
+        count = rng.randrange(3 if size else 1, 13 if size else 11)
+        clauses = random_cnf(rng, count, size)
+        solver = sat.Solver(clauses)
+        solver.reserve(count)
+        expected = brute_force(clauses, count)
+        self.assertEqual(solver.solve(), expected, clauses)
+        if expected:
+            self.assertTrue(satisfies(solver.model, clauses))
+
+        # The same solver answers again under assumptions, keeping what it
+        # learned from earlier calls
+        for _ in range(5):
+            assumptions = [variable if rng.random() < 0.5 else -variable
+                           for variable in rng.sample(range(1, count + 1),
+                                                      rng.randrange(0, count + 1))]
+            expected = brute_force(clauses, count, assumptions)
+            self.assertEqual(solver.solve(assumptions), expected, (clauses, assumptions))
+            if expected:
+                self.assertTrue(satisfies(solver.model, clauses + [[a] for a in assumptions]))
+
+    def test_random_cnfs(self):
+        for seed in range(500):
+            self.check(seed)
+
+    def test_random_cnfs_with_clean_ups(self):
+        # Clean up learned clauses after every few conflicts
+        first, growth = sat.REDUCE_FIRST, sat.REDUCE_GROWTH
+        sat.REDUCE_FIRST, sat.REDUCE_GROWTH = 2, 1
+        try:
+            for seed in range(500, 800):
+                self.check(seed, size=3)
+        finally:
+            sat.REDUCE_FIRST, sat.REDUCE_GROWTH = first, growth
+
+    def test_clean_ups_on_hard_instance(self):
+        # Random 3-SAT near the threshold learns enough to clean up often;
+        # the answer must match a solver that keeps every learned clause
+        rng = random.Random(0)
+        clauses = [[variable if rng.random() < 0.5 else -variable
+                    for variable in rng.sample(range(1, 61), 3)]
+                   for _ in range(256)]
+        first, growth = sat.REDUCE_FIRST, sat.REDUCE_GROWTH
+        sat.REDUCE_FIRST, sat.REDUCE_GROWTH = 20, 5
+        try:
+            solver = sat.Solver(clauses)
+            answer = solver.solve()
+        finally:
+            sat.REDUCE_FIRST, sat.REDUCE_GROWTH = first, growth
+        keeping = sat.Solver(clauses)
+        keeping.reduce_limit = float("inf")
+        self.assertEqual(answer, keeping.solve())
+        if answer:
+            self.assertTrue(satisfies(solver.model, clauses))
+        self.assertGreater(solver.reduce_limit, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()